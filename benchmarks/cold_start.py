@@ -0,0 +1,132 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+## \brief Функция предобработки данных из исходной версии Keeper_AI
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] data_df DataFrame с данными
+## \param[in] data_type Тип данных: "train" или "test"
+## \details Копия preprocess.preprocess до появления FeatureEncoder: три прохода pd.get_dummies и StandardScaler, который обучается заново на каждом наборе данных. Хранится в бенчмарке, чтобы режим legacy измерял исходный путь, а не текущий код preprocess
+## \return Кортеж tuple() с признаками и целевыми переменными для data_type="train", иначе DataFrame с признаками
+def legacy_preprocess (data_df, data_type: str):
+    import pandas as pd
+    from sklearn.preprocessing import StandardScaler
+
+    data_df.drop(columns=["CustomerID", "Tenure", "Last Interaction"], inplace=True)
+    data_df.dropna(inplace=True)
+
+    data_df = pd.get_dummies(data_df, prefix=["gender"], columns=["Gender"], dtype=int)
+    data_df = pd.get_dummies(data_df, prefix=["sub_type"], columns=["Subscription Type"], dtype=int)
+    data_df = pd.get_dummies(data_df, prefix=["contract_len"], columns=["Contract Length"], dtype=int)
+
+    if data_type == "train":
+        X = data_df.drop(columns=["Churn"])
+        Y = data_df["Churn"]
+        X_columns = X.columns
+
+        scaler = StandardScaler().fit(X)
+        X = pd.DataFrame(data=scaler.transform(X), columns=X_columns)
+
+        return (X, Y)
+    else:
+        X = data_df.copy()
+        X_columns = X.columns
+
+        scaler = StandardScaler().fit(X)
+        X = pd.DataFrame(data=scaler.transform(X), columns=X_columns)
+
+        return X
+
+## \brief Функция одного запуска предсказаний в выбранном режиме
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \param[in] mode Режим запуска: "legacy" или "pipeline"
+## \param[in] clients Путь до данных клиентов в формате .CSV
+## \param[in] model_dir Каталог с model/pipeline.pkl и model/HistGradientBoostingClassifier.pkl
+## \return None
+def run_once (mode: str, clients: str, model_dir: str) -> None:
+    import joblib
+    import pandas as pd
+
+    clients_data = pd.read_csv(clients, index_col=[0])
+
+    if mode == "legacy":
+        clients_data_prep = legacy_preprocess(clients_data.copy(), data_type="test")
+        train_data = pd.read_csv("data/train.csv")
+        X, Y = legacy_preprocess(train_data, data_type="train")
+        model = joblib.load(f"{model_dir}/HistGradientBoostingClassifier.pkl")
+        model.predict(clients_data_prep)
+    else:
+        from pipeline import PIPELINE_FILENAME, load_pipeline
+        from scoring import predict_frame
+
+        pipeline = load_pipeline(f"{model_dir}/{PIPELINE_FILENAME}")
+        predict_frame(pipeline, clients_data.copy())
+
+## \brief Функция подготовки моделей для обоих режимов
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \param[in] model_dir Каталог, в который будут сохранены модели
+## \return None
+def prepare (model_dir: str) -> None:
+    import joblib
+    import pandas as pd
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from pipeline import PIPELINE_FILENAME, fit_pipeline, save_pipeline
+
+    if os.path.exists(model_dir) == False:
+        os.makedirs(model_dir)
+
+    train_data = pd.read_csv("data/train.csv")
+    save_pipeline(fit_pipeline(train_data.copy(), HistGradientBoostingClassifier()), f"{model_dir}/{PIPELINE_FILENAME}")
+
+    X, Y = legacy_preprocess(train_data, data_type="train")
+    joblib.dump(HistGradientBoostingClassifier().fit(X, Y), f"{model_dir}/HistGradientBoostingClassifier.pkl")
+
+## \brief Бенчмарк холодного старта предсказаний без обучения
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \details Каждый замер запускается в отдельном процессе, поэтому в него входят импорты, чтение файлов и загрузка модели
+## \details Режим <b>legacy</b> повторяет старый путь main.main() с исходной предобработкой legacy_preprocess: три прохода pd.get_dummies и StandardScaler на данных клиентов, чтение и предобработка data/train.csv, загрузка HistGradientBoostingClassifier.pkl и предсказание
+## \details Режим <b>pipeline</b> загружает только model/pipeline.pkl и данные клиентов
+## \details Пример запуска из каталога Keeper_AI:
+## \code
+# python benchmarks/cold_start.py --clients data/test.csv --repeat 5
+## \endcode
+## \return None
+def main ():
+    parser = argparse.ArgumentParser(description="Бенчмарк холодного старта предсказаний Keeper_AI")
+    parser.add_argument("--clients", type=str, default="data/test.csv", help="Путь до данных клиентов в формате .CSV")
+    parser.add_argument("--model-dir", type=str, default="benchmarks/output/model", help="Каталог с моделями для бенчмарка")
+    parser.add_argument("--repeat", type=int, default=5, help="Количество запусков для каждого режима")
+    parser.add_argument("--run", type=str, choices=["legacy", "pipeline"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_once(args.run, args.clients, args.model_dir)
+        return
+
+    prepare(args.model_dir)
+
+    for mode in ["legacy", "pipeline"]:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--run", mode, "--clients", args.clients, "--model-dir", args.model_dir], check=True)
+            timings.append(time.perf_counter() - start)
+
+        timings.sort()
+        print(f"{mode}: min={timings[0]:.3f}s median={timings[len(timings) // 2]:.3f}s max={timings[-1]:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import argparse
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import numpy as np
+import pandas as pd
+
+## \brief Количество строк, которые генерируются и записываются за один раз
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Файл записывается по частям, поэтому расход памяти при генерации 100 млн строк такой же, как при генерации 1 млн
+GENERATE_CHUNKSIZE = 1_000_000
+
+## \brief Значения категориальных признаков
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+CATEGORIES = {
+    "Gender": ["Female", "Male"],
+    "Subscription Type": ["Basic", "Standard", "Premium"],
+    "Contract Length": ["Monthly", "Quarterly", "Annual"]
+}
+
+## \brief Диапазоны целочисленных признаков
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Диапазоны совпадают с минимумами и максимумами столбцов data/test.csv. Обе границы входят в диапазон
+RANGES = {
+    "Age": (18, 65),
+    "Tenure": (1, 60),
+    "Usage Frequency": (1, 30),
+    "Support Calls": (0, 10),
+    "Payment Delay": (0, 30),
+    "Total Spend": (100, 1000),
+    "Last Interaction": (1, 30)
+}
+
+## \brief Функция разбора количества строк
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] value Количество строк числом или с суффиксом k или M, например "10k" или "100M"
+## \return Количество строк
+def parse_size (value: str) -> int:
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    value = value.strip().replace("_", "")
+
+    if value[-1].lower() in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1].lower()])
+
+    return int(value)
+
+## \brief Функция генерации синтетических данных клиентов
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] n_rows Количество строк
+## \param[in] rng Генератор np.random.Generator
+## \param[in] start_id Первый CustomerID. По умолчанию = 1
+## \param[in] churn Аргумент определяет добавление столбца Churn, как в тренировочных данных. По умолчанию = True
+## \details Признаки распределены равномерно в диапазонах RANGES и CATEGORIES. Churn зависит от признаков через логистическую функцию, поэтому модель может ему обучиться, а доля ушедших клиентов близка к половине:
+## \code
+# logit = 0.25 * (support_calls - 5) + 0.12 * (payment_delay - 15) - 0.004 * (total_spend - 550) + 1.2 * monthly - 0.6 * premium + ...
+# churn = rng.random(n_rows) < 1 / (1 + np.exp(-logit))
+## \endcode
+## \return DataFrame со столбцами CustomerID, признаками из RANGES и CATEGORIES и, если churn=True, столбцом Churn
+def generate_clients (n_rows: int, rng: np.random.Generator, start_id: int=1, churn: bool=True) -> pd.DataFrame:
+    data = {"CustomerID": np.arange(start_id, start_id + n_rows)}
+
+    for name in ["Age", "Gender", "Tenure", "Usage Frequency", "Support Calls", "Payment Delay", "Subscription Type", "Contract Length", "Total Spend", "Last Interaction"]:
+        if name in CATEGORIES:
+            data[name] = np.array(CATEGORIES[name], dtype=object)[rng.integers(0, len(CATEGORIES[name]), n_rows)]
+        else:
+            data[name] = rng.integers(RANGES[name][0], RANGES[name][1] + 1, n_rows)
+
+    clients_data = pd.DataFrame(data, index=pd.RangeIndex(start_id - 1, start_id - 1 + n_rows))
+
+    if churn:
+        logit = (0.25 * (data["Support Calls"] - 5) + 0.12 * (data["Payment Delay"] - 15) - 0.004 * (data["Total Spend"] - 550)
+                 + 0.02 * (data["Age"] - 42) - 0.04 * (data["Usage Frequency"] - 15)
+                 + 1.2 * (data["Contract Length"] == "Monthly") - 0.6 * (data["Subscription Type"] == "Premium") + 0.3 * (data["Gender"] == "Female") - 0.5)
+        clients_data["Churn"] = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(np.int64)
+
+    return clients_data
+
+## \brief Функция записи файла с синтетическими данными клиентов
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \param[in] fpath Путь до файла в формате [.CSV|.XLSX|.PARQUET|.FEATHER|.ARROW]
+## \param[in] n_rows Количество строк
+## \param[in] churn Аргумент определяет добавление столбца Churn. По умолчанию = True
+## \param[in] seed Зерно генератора. По умолчанию = 42
+## \param[in] chunksize Количество строк в одной части. По умолчанию = GENERATE_CHUNKSIZE
+## \param[in] index Аргумент определяет запись индекса в файл. По умолчанию = None ( индекс записывается только при churn=False )
+## \details Части записываются через data_io.PredictionWriter, а файлы .CSV и .PARQUET дописываются по частям. Данные клиентов ( churn=False ) записываются, как data/test.csv, с безымянным первым столбцом с индексом. Тренировочные данные записываются, как data/train.csv, без индекса: он читается без index_col, и лишний столбец стал бы признаком. Если один файл нужен и для обучения, и для предсказаний через data_io.read_clients ( как в suite.py ), то нужно указать index=True Форматы .XLSX и .FEATHER записываются одним вызовом и подходят только для небольших файлов
+## \details Генератор каждой части получает зерно [seed, номер части], поэтому при тех же seed и chunksize файл получается одинаковым
+## \return None
+def generate_file (fpath: str, n_rows: int, churn: bool=True, seed: int=42, chunksize: int=GENERATE_CHUNKSIZE, index: bool=None) -> None:
+    from data_io import PredictionWriter
+
+    dest_dir = os.path.dirname(fpath)
+    if dest_dir != "" and os.path.exists(dest_dir) == False:
+        os.makedirs(dest_dir)
+
+    with PredictionWriter(fpath, index=churn == False if index == None else index) as writer:
+        for number, start in enumerate(range(0, n_rows, chunksize)):
+            rng = np.random.default_rng([seed, number])
+            writer.write(generate_clients(min(chunksize, n_rows - start), rng, start_id=start + 1, churn=churn))
+
+## \brief Генератор синтетических данных клиентов
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Создает файл с той же схемой, что и data/train.csv ( или data/test.csv с флагом --no-churn ), размером от 10 тыс. до 100 млн строк
+## \details Пример запуска из каталога Keeper_AI:
+## \code
+# python benchmarks/generate_data.py --rows 100k --out data/train.csv
+# python benchmarks/generate_data.py --rows 10M --out data/clients_10M.parquet --no-churn
+## \endcode
+## \return None
+def main ():
+    parser = argparse.ArgumentParser(description="Генератор синтетических данных клиентов Keeper_AI")
+    parser.add_argument("--rows", type=parse_size, default=parse_size("100k"), help="Количество строк, например 10000, 10k или 100M. По умолчанию = 100k")
+    parser.add_argument("--out", type=str, default="data/train.csv", help="Путь до файла в формате [.CSV|.XLSX|.PARQUET|.FEATHER|.ARROW]. По умолчанию = data/train.csv")
+    parser.add_argument("--no-churn", action="store_true", help="Флаг отключает столбец Churn, как в данных клиентов для предсказаний")
+    parser.add_argument("--seed", type=int, default=42, help="Зерно генератора. По умолчанию = 42")
+    parser.add_argument("--chunksize", type=int, default=GENERATE_CHUNKSIZE, help="Количество строк, записываемых за один раз")
+    args = parser.parse_args()
+
+    generate_file(args.out, args.rows, churn=args.no_churn == False, seed=args.seed, chunksize=args.chunksize)
+    print(f"Файл {args.out} с {args.rows} строками создан")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from data_io import CLIENT_COLUMNS
+
+## \brief Функция отправки запросов одним клиентом
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] host Адрес сервера
+## \param[in] port Порт сервера
+## \param[in] bodies Список тел запросов
+## \param[out] latencies Список, в который добавляется время ответа на каждый запрос в секундах
+## \param[out] errors Список, в который добавляются ошибочные ответы
+## \return None
+def run_client (host: str, port: int, bodies: list[bytes], latencies: list, errors: list) -> None:
+    connection = http.client.HTTPConnection(host, port)
+
+    for body in bodies:
+        start = time.perf_counter()
+        connection.request("POST", "/predict", body=body, headers={"Content-Type": "application/x-ndjson"})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+
+        if response.status != 200:
+            errors.append(response.status)
+
+    connection.close()
+
+## \brief Нагрузочный тест сервера предсказаний server.py
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Несколько потоков-клиентов одновременно отправляют запросы с записями из файла клиентов. После теста выводятся медиана и 99-й процентиль задержки и количество запросов в секунду
+## \details Пример запуска из каталога Keeper_AI при запущенном сервере:
+## \code
+# python benchmarks/load_test.py --clients data/test.csv --concurrency 16 --requests 200
+## \endcode
+## \return None
+def main ():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест сервера предсказаний Keeper_AI")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Адрес сервера")
+    parser.add_argument("--port", type=int, default=8000, help="Порт сервера")
+    parser.add_argument("--clients", type=str, default="data/test.csv", help="Путь до данных клиентов в формате .CSV")
+    parser.add_argument("--concurrency", type=int, default=16, help="Количество одновременных клиентов")
+    parser.add_argument("--requests", type=int, default=200, help="Количество запросов от каждого клиента")
+    parser.add_argument("--batch", type=int, default=1, help="Количество записей в одном запросе")
+    args = parser.parse_args()
+
+    records = pd.read_csv(args.clients, usecols=CLIENT_COLUMNS, nrows=args.concurrency * args.requests * args.batch).to_dict(orient="records")
+    bodies = ["\n".join(json.dumps(record) for record in records[i:i + args.batch]).encode("utf-8") for i in range(0, len(records), args.batch)]
+
+    latencies, errors, threads = [], [], []
+    for i in range(args.concurrency):
+        thread = threading.Thread(target=run_client, args=(args.host, args.port, bodies[i::args.concurrency], latencies, errors))
+        threads.append(thread)
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"Запросов: {len(latencies)} ( ошибок: {len(errors)} ), записей в запросе: {args.batch}, клиентов: {args.concurrency}")
+    print(f"Задержка p50: {np.percentile(latencies, 50) * 1000:.2f}мс, p99: {np.percentile(latencies, 99) * 1000:.2f}мс")
+    print(f"Запросов в секунду: {len(latencies) / elapsed:.0f}, записей в секунду: {len(latencies) * args.batch / elapsed:.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from data_io import CLIENT_COLUMNS
+from pipeline import Predictor, load_pipeline
+from scoring import predict_frame
+from cold_start import legacy_preprocess
+
+## \brief Функция замера задержки на каждую запись
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] function Функция, которая вызывается для каждой записи
+## \param[in] records Список записей
+## \return Массив numpy с задержками в секундах
+def measure (function, records: list) -> np.ndarray:
+    latencies = np.empty(len(records))
+
+    for i, record in enumerate(records):
+        start = time.perf_counter()
+        function(record)
+        latencies[i] = time.perf_counter() - start
+
+    return latencies
+
+## \brief Функция предсказания исходным путем Keeper_AI
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] pipeline Конвейер, модель которого используется для предсказаний
+## \param[in] data_df DataFrame со всеми столбцами данных клиентов, как в data/test.csv
+## \details Признаки строятся функцией cold_start.legacy_preprocess: три прохода pd.get_dummies и StandardScaler, обученный на самих данных. Для одной записи pd.get_dummies создает только столбцы встретившихся значений, поэтому признаки дополняются нулями до признаков модели через reindex. Предсказания при этом не совпадают с конвейером, функция нужна только для замера накладных расходов
+## \return Массив numpy с исходами
+def predict_legacy (pipeline: dict, data_df: pd.DataFrame) -> np.ndarray:
+    X = legacy_preprocess(data_df, data_type="test").reindex(columns=pipeline["encoder"].feature_names_, fill_value=0)
+    return pipeline["model"].predict(X.to_numpy())
+
+## \brief Микробенчмарк предсказаний для одного клиента
+## \authors ivan-dev-lab
+## \version 1.2.0
+## \date 18.10.2026
+## \details Сравниваются задержка на одну запись исходным путем predict_legacy ( DataFrame, pd.get_dummies, StandardScaler ), через predict_frame ( DataFrame, preprocess, FeatureEncoder ) и через Predictor.predict_one, а также скорость пакетных предсказаний теми же тремя путями
+## \details Пример запуска из каталога Keeper_AI:
+## \code
+# python benchmarks/predict_one.py --model C:/Users/User/Keeper_AI-work/model --records 1000
+## \endcode
+## \return None
+def main ():
+    parser = argparse.ArgumentParser(description="Микробенчмарк предсказаний для одного клиента Keeper_AI")
+    parser.add_argument("--model", type=str, required=True, help="Путь до каталога model с реестром моделей или до файла pipeline.pkl")
+    parser.add_argument("--clients", type=str, default="data/test.csv", help="Путь до данных клиентов в формате .CSV")
+    parser.add_argument("--records", type=int, default=1000, help="Количество записей для замера")
+    args = parser.parse_args()
+
+    pipeline = load_pipeline(args.model)
+    predictor = Predictor(pipeline)
+    clients_data = pd.read_csv(args.clients, usecols=CLIENT_COLUMNS, nrows=args.records)
+    records = clients_data.to_dict(orient="records")
+    legacy_data = pd.read_csv(args.clients, index_col=[0], nrows=args.records)
+    legacy_records = legacy_data.to_dict(orient="records")
+
+    legacy_latencies = measure(lambda record: predict_legacy(pipeline, pd.DataFrame([record])), legacy_records)
+    print(f"predict_legacy: p50={np.percentile(legacy_latencies, 50) * 1e6:.0f}мкс p99={np.percentile(legacy_latencies, 99) * 1e6:.0f}мкс")
+
+    paths = {
+        "predict_frame": lambda record: predict_frame(pipeline, pd.DataFrame([record])),
+        "Predictor.predict_one": predictor.predict_one
+    }
+
+    for name, function in paths.items():
+        latencies = measure(function, records)
+        print(f"{name}: p50={np.percentile(latencies, 50) * 1e6:.0f}мкс p99={np.percentile(latencies, 99) * 1e6:.0f}мкс")
+
+    for name, function in {"predict_legacy": lambda: predict_legacy(pipeline, legacy_data.copy()), "predict_frame": lambda: predict_frame(pipeline, clients_data.copy()), "Predictor.predict_many": lambda: predictor.predict_many(records)}.items():
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        print(f"{name} ( {len(records)} записей ): {elapsed * 1000:.1f}мс, {len(records) / elapsed:.0f} записей/сек")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+## \brief Модули, которые не должны загружаться при предсказаниях
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+HEAVY_MODULES = ["tensorflow", "keras", "matplotlib", "seaborn"]
+
+## \brief Функция разбора вывода python -X importtime
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] stderr Вывод процесса в stderr
+## \details Строка вывода имеет вид "import time: self [us] | cumulative | imported package". Модули верхнего уровня записаны без отступа, поэтому сумма их cumulative - это общее время импорта
+## \return Кортеж tuple(), содержащий общее время импорта в секундах, список пар ( время в секундах, модуль ) верхнего уровня и множество всех загруженных модулей
+def parse_importtime (stderr: str) -> tuple:
+    top_level, modules = [], set()
+
+    for line in stderr.splitlines():
+        if line.startswith("import time:") == False or "imported package" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        if name.startswith(" ") and name.startswith("  ") == False:
+            top_level.append((int(cumulative) / 1e6, name.strip()))
+
+    return sum(seconds for seconds, _ in top_level), sorted(top_level, reverse=True), modules
+
+## \brief Функция замера одной точки входа
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] command Аргументы командной строки после python
+## \param[in] repeat Количество запусков
+## \return Словарь dict() с медианой времени запуска, временем импорта, самыми тяжелыми импортами и загруженными тяжелыми модулями
+def measure (command: list[str], repeat: int) -> dict:
+    wall_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *command], cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        wall_times.append(time.perf_counter() - start)
+
+    process = subprocess.run([sys.executable, "-X", "importtime", *command], cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    import_time, top_level, modules = parse_importtime(process.stderr)
+
+    return {
+        "wall_time": sorted(wall_times)[len(wall_times) // 2],
+        "import_time": import_time,
+        "top_imports": top_level[:3],
+        "heavy": [name for name in HEAVY_MODULES if name in modules]
+    }
+
+## \brief Бенчмарк времени запуска точек входа
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \details Каждая точка входа запускается в отдельном процессе repeat раз, выводится медиана времени запуска. Затем точка входа запускается с python -X importtime, чтобы показать время импорта, три самых тяжелых импорта и загруженные модули из HEAVY_MODULES
+## \details Если указан флаг --clients, то также замеряется холодный старт предсказаний main.py. Перед замером main.py запускается один раз, чтобы обучить модель и сохранить ее в реестр model
+## \details Пример запуска из каталога Keeper_AI:
+## \code
+# python benchmarks/startup.py --clients data/test.csv --repeat 5
+## \endcode
+## \return None
+def main ():
+    parser = argparse.ArgumentParser(description="Бенчмарк времени запуска точек входа Keeper_AI")
+    parser.add_argument("--clients", type=str, default=None, help="Путь до данных клиентов для замера холодного старта предсказаний main.py")
+    parser.add_argument("--repeat", type=int, default=5, help="Количество запусков каждой точки входа")
+    args = parser.parse_args()
+
+    entry_points = {
+        "main.py --help": ["main.py", "--help"],
+        "server.py --help": ["server.py", "--help"],
+        "import rate": ["-c", "import rate"],
+        "import pipeline": ["-c", "import pipeline"]
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.clients != None:
+            command = ["main.py", "--clients", os.path.abspath(args.clients), "--pred", f"{tmp_dir}/pred.csv".replace("\\", "/")]
+            subprocess.run([sys.executable, *command], cwd=ROOT_DIR, stdout=subprocess.DEVNULL, check=True)
+            entry_points["main.py --clients"] = command
+
+        for name, command in entry_points.items():
+            result = measure(command, args.repeat)
+            top_imports = ", ".join(f"{module} {seconds:.2f}с" for seconds, module in result["top_imports"])
+
+            print(f"{name}: запуск {result['wall_time']:.2f}с, импорт {result['import_time']:.2f}с ( {top_imports} )")
+            print(f"    тяжелые модули: {', '.join(result['heavy']) if len(result['heavy']) > 0 else 'нет'}")
+
+if __name__ == "__main__":
+    main()
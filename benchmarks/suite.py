@@ -0,0 +1,240 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shlex
+import subprocess
+import sys
+import time
+import uuid
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from generate_data import generate_file, parse_size
+
+## \brief Этапы, которые замеряет бенчмарк
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details <ol>
+## <li><b>read</b> - чтение файла клиентов функцией data_io.read_clients</li>
+## <li><b>read_train</b> - чтение того же файла со столбцом Churn как тренировочных данных</li>
+## <li><b>preprocess</b> - функция preprocess.preprocess с data_type="train"</li>
+## <li><b>train</b> - обучение HistGradientBoostingClassifier. В режимах memmap и sample этап включает чтение и предобработку частями функцией training.fit_streaming_pipeline, а этапы read_train и preprocess не замеряются</li>
+## <li><b>score</b> - запуск python main.py с сохраненной моделью от старта процесса до записи предсказаний</li>
+## </ol>
+STAGES = ["read", "read_train", "preprocess", "train", "score"]
+
+## \brief Функция получения версии кода
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Если в каталоге есть незакоммиченные изменения, то к хэшу коммита добавляется "-dirty"
+## \return Короткий хэш коммита git или None, если git недоступен
+def get_commit ():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return commit + ("-dirty" if status != "" else "")
+
+## \brief Функция замера этапов в отдельном процессе
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \param[in] fpath Путь до файла с синтетическими данными
+## \param[in] model_dir Каталог реестра моделей, в котором обученный конвейер назначается текущей версией. Затем его загружает main.py
+## \param[in] args Аргументы командной строки бенчмарка
+## \details Выводит в последней строке JSON со словарем {этап: {"seconds", "rows", "peak_rss"}}. peak_rss - пиковый расход памяти процесса на момент окончания этапа
+## \return None
+def run_stages (fpath: str, model_dir: str, args: argparse.Namespace) -> None:
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from data_io import read_clients
+    from model_registry import ModelRegistry
+    from preprocess import USED_COLUMNS, preprocess
+    from profiler import peak_rss
+    from training import TRAIN_SAMPLE_ROWS, fit_streaming_pipeline
+
+    result = lambda start, rows: {"seconds": time.perf_counter() - start, "rows": rows, "peak_rss": peak_rss()}
+    results = {}
+
+    start = time.perf_counter()
+    clients_data = read_clients(fpath)
+    results["read"] = result(start, len(clients_data))
+    del clients_data
+
+    if args.train_mode == "pandas":
+        start = time.perf_counter()
+        train_data = read_clients(fpath, columns=USED_COLUMNS + ["Churn"])
+        results["read_train"] = result(start, len(train_data))
+
+        state = {}
+        start = time.perf_counter()
+        X, Y = preprocess(train_data, data_type="train", state=state)
+        results["preprocess"] = result(start, len(Y))
+        del train_data
+
+        model = HistGradientBoostingClassifier()
+        start = time.perf_counter()
+        model.fit(X.to_numpy(), Y)
+        results["train"] = result(start, len(Y))
+
+        pipeline = {"encoder": state["encoder"], "scaler": state["scaler"], "model": model, "version": uuid.uuid4().hex}
+    else:
+        start = time.perf_counter()
+        pipeline, train_rows = fit_streaming_pipeline(fpath, HistGradientBoostingClassifier(), args.train_mode, max_rows=args.max_train_rows or TRAIN_SAMPLE_ROWS, work_dir=model_dir)
+        results["train"] = result(start, train_rows)
+
+    registry = ModelRegistry(model_dir)
+    registry.register(pipeline, "HistGradientBoostingClassifier", version=pipeline["version"], features=pipeline["encoder"].feature_names_)
+    registry.promote(pipeline["version"])
+    registry.prune(0)
+    print(json.dumps(results))
+
+## \brief Функция замера предсказаний main.py от запуска процесса до записи файла
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] fpath Путь до файла с клиентами
+## \param[in] pred_path Путь до файла с предсказаниями. Модель загружается из каталога model рядом с ним
+## \param[in] score_args Дополнительные аргументы main.py, например ["--chunksize", "1000000"]
+## \details Пиковый расход памяти процесса main.py берется из os.wait4. В Windows этой функции нет, поэтому там память не замеряется
+## \return Словарь dict() с ключами seconds и peak_rss
+def run_score (fpath: str, pred_path: str, score_args: list[str]) -> dict:
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "main.py", "--clients", fpath, "--pred", pred_path, *score_args], cwd=ROOT_DIR, stdout=subprocess.DEVNULL)
+
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        memory = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    else:
+        process.wait()
+        memory = None
+    seconds = time.perf_counter() - start
+
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, process.args)
+
+    return {"seconds": seconds, "peak_rss": memory}
+
+## \brief Функция загрузки прошлых результатов
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] fpath Путь до файла .JSONL с результатами
+## \return Список словарей с результатами в порядке записи
+def load_results (fpath: str) -> list[dict]:
+    if os.path.exists(fpath) == False:
+        return []
+
+    with open(fpath, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip() != ""]
+
+## \brief Функция вывода результатов и сравнения с прошлым запуском
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] records Результаты текущего запуска
+## \param[in] history Результаты прошлых запусков
+## \param[in] threshold Доля замедления, после которой этап отмечается как регрессия
+## \details Каждый этап сравнивается с последним прошлым запуском с тем же размером, форматом, режимом обучения и аргументами main.py
+## \return Количество регрессий
+def report (records: list[dict], history: list[dict], threshold: float) -> int:
+    key = lambda record: (record["rows"], record["format"], record["train_mode"], record["score_args"], record["stage"])
+    previous = {key(record): record for record in history}
+    regressions = 0
+
+    print(f"{'строк':>11}{'формат':>9}{'этап':>12}{'время, с':>11}{'строк/сек':>13}{'пик RSS, МБ':>13}{'прошлый, с':>12}{'изменение':>11}")
+    for record in records:
+        speed = f"{record['stage_rows'] / record['seconds']:.0f}" if record["stage_rows"] and record["seconds"] > 0 else "-"
+        memory = f"{record['peak_rss'] / 2**20:.0f}" if record["peak_rss"] != None else "-"
+        line = f"{record['rows']:>11}{record['format']:>9}{record['stage']:>12}{record['seconds']:>11.3f}{speed:>13}{memory:>13}"
+
+        if key(record) in previous:
+            before = previous[key(record)]["seconds"]
+            change = record["seconds"] / before - 1 if before > 0 else 0.0
+            line += f"{before:>12.3f}{change:>+11.1%}"
+            if change > threshold:
+                line += f"  РЕГРЕССИЯ ( {previous[key(record)]['commit']} )"
+                regressions += 1
+        print(line)
+
+    return regressions
+
+## \brief Бенчмарк обработки данных разного размера и формата
+## \authors ivan-dev-lab
+## \version 1.0.1
+## \date 18.10.2026
+## \details Для каждого размера и формата синтетический файл создается функцией generate_data.generate_file один раз и затем переиспользуется. Файл служит и тренировочными данными, и данными клиентов для main.py, поэтому записывается с индексом ( index=True ). Этапы из STAGES выполняются в отдельном процессе, поэтому пиковая память одного размера не влияет на другие
+## \details Результаты дописываются в файл .JSONL ( по умолчанию benchmarks/output/results.jsonl ) вместе с коммитом git, версией Python и датой. Каждый запуск сравнивается с последним прошлым запуском с теми же параметрами, а этапы, замедлившиеся больше чем на --threshold, отмечаются как регрессия. Чтобы сравнить две версии, нужно запустить бенчмарк на каждой из них с одним файлом результатов
+## \details Для файлов от 10 млн строк лучше обучать модель в режиме sample и предсказывать по частям, иначе файл целиком загружается в память:
+## \code
+# python benchmarks/suite.py --sizes 10k 1M --formats csv parquet
+# python benchmarks/suite.py --sizes 100M --formats parquet --train-mode sample --score-args "--chunksize 1000000 --workers 4"
+## \endcode
+## \return None
+def main ():
+    parser = argparse.ArgumentParser(description="Бенчмарк чтения, предобработки, обучения и предсказаний Keeper_AI на синтетических данных")
+    parser.add_argument("--sizes", type=parse_size, nargs="+", default=[parse_size("10k"), parse_size("100k"), parse_size("1M")], help="Размеры файлов, например 10k 1M 100M. По умолчанию = 10k 100k 1M")
+    parser.add_argument("--formats", type=str, nargs="+", choices=["csv", "parquet", "feather", "xlsx"], default=["csv", "parquet"], help="Форматы файлов. По умолчанию = csv parquet")
+    parser.add_argument("--train-mode", type=str, choices=["pandas", "memmap", "sample"], default="pandas", help="Режим обучения, как в --train-mode main.py. По умолчанию = pandas")
+    parser.add_argument("--max-train-rows", type=int, default=None, help="Размер выборки для --train-mode sample")
+    parser.add_argument("--score-args", type=str, default="", help="Дополнительные аргументы main.py в кавычках, например \"--chunksize 100000\"")
+    parser.add_argument("--data-dir", type=str, default="benchmarks/output/data", help="Каталог для синтетических файлов")
+    parser.add_argument("--results", type=str, default="benchmarks/output/results.jsonl", help="Файл .JSONL, в который дописываются результаты")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Доля замедления этапа, после которой он отмечается как регрессия. По умолчанию = 0.1")
+    parser.add_argument("--seed", type=int, default=42, help="Зерно генератора данных")
+    parser.add_argument("--run", type=str, nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_stages(*args.run, args)
+        return
+
+    from data_io import STREAMING_FORMATS
+    if args.train_mode != "pandas" and len(set(args.formats) - set(STREAMING_FORMATS)) > 0:
+        parser.error(f"--train-mode {args.train_mode} поддерживает только форматы {' '.join(STREAMING_FORMATS)}")
+
+    run_id, commit = uuid.uuid4().hex, get_commit()
+    history = load_results(args.results)
+    records = []
+
+    for rows in args.sizes:
+        for file_format in args.formats:
+            fpath = os.path.abspath(f"{args.data_dir}/clients_{rows}_{args.seed}.{file_format}")
+            work_dir = os.path.abspath(f"{args.data_dir}/run_{rows}_{file_format}")
+            if os.path.exists(fpath) == False:
+                print(f"Создание {fpath}")
+                generate_file(fpath, rows, seed=args.seed, index=True)
+            if os.path.exists(f"{work_dir}/model") == False:
+                os.makedirs(f"{work_dir}/model")
+
+            process = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", fpath, f"{work_dir}/model", *sys.argv[1:]], stdout=subprocess.PIPE, text=True, check=True)
+            stages = json.loads(process.stdout.splitlines()[-1])
+            stages["score"] = {"rows": rows, **run_score(fpath, f"{work_dir}/pred.{file_format}", shlex.split(args.score_args))}
+
+            for name in STAGES:
+                if name in stages:
+                    records.append({
+                        "run_id": run_id, "commit": commit, "date": datetime.datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                        "rows": rows, "format": file_format, "train_mode": args.train_mode, "score_args": args.score_args,
+                        "stage": name, "seconds": stages[name]["seconds"], "stage_rows": stages[name].get("rows"), "peak_rss": stages[name]["peak_rss"]
+                    })
+
+    regressions = report(records, history, args.threshold)
+
+    if os.path.dirname(args.results) != "" and os.path.exists(os.path.dirname(args.results)) == False:
+        os.makedirs(os.path.dirname(args.results))
+    with open(args.results, "a", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    print(f"Результаты запуска {commit or run_id} добавлены в {args.results}. Регрессий: {regressions}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+## \brief Функция одного обучения в выбранном режиме
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] mode Режим из training.TRAIN_MODES или "warm" ( дообучение модели из режима pandas в режиме memmap )
+## \param[in] args Аргументы командной строки бенчмарка
+## \details Пиковая память до чтения данных запоминается отдельно, чтобы из результата можно было вычесть память импортов
+## \return None
+def run_once (mode: str, args: argparse.Namespace) -> None:
+    import pandas as pd
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from pipeline import PIPELINE_FILENAME, fit_pipeline, load_pipeline, save_pipeline
+    from profiler import peak_rss
+    from training import fit_streaming_pipeline
+
+    baseline = peak_rss()
+    start = time.perf_counter()
+
+    if mode == "pandas":
+        train_data = pd.read_csv(args.train)
+        pipeline, rows = fit_pipeline(train_data, HistGradientBoostingClassifier()), len(train_data)
+        del train_data
+    elif mode == "warm":
+        previous = load_pipeline(f"{args.model_dir}/{PIPELINE_FILENAME}")
+        pipeline, rows = fit_streaming_pipeline(args.train, None, "memmap", chunksize=args.chunksize, work_dir=args.model_dir, previous=previous)
+    else:
+        pipeline, rows = fit_streaming_pipeline(args.train, HistGradientBoostingClassifier(), mode, chunksize=args.chunksize, max_rows=args.max_train_rows, work_dir=args.model_dir)
+
+    fit_time = time.perf_counter() - start
+
+    if mode == "pandas":
+        save_pipeline(pipeline, f"{args.model_dir}/{PIPELINE_FILENAME}")
+
+    print(json.dumps({"rows": rows, "fit_time": fit_time, "peak_rss": peak_rss(), "baseline": baseline}))
+
+## \brief Бенчмарк памяти и времени обучения в разных режимах
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Каждый режим обучается в отдельном процессе, поэтому пиковая память ( peak RSS ) одного режима не влияет на другие. Выводятся количество строк, время обучения, пиковая память процесса и ее прирост после импортов
+## \details Режим <b>warm</b> дообучает модель, обученную в режиме pandas, поэтому pandas всегда запускается первым
+## \details Пример запуска из каталога Keeper_AI:
+## \code
+# python benchmarks/train_memory.py --train data/train.csv --max-train-rows 100000
+## \endcode
+## \return None
+def main ():
+    parser = argparse.ArgumentParser(description="Бенчмарк памяти и времени обучения Keeper_AI")
+    parser.add_argument("--train", type=str, default="data/train.csv", help="Путь до тренировочных данных в формате [.CSV|.PARQUET]")
+    parser.add_argument("--model-dir", type=str, default="benchmarks/output/train", help="Каталог для модели и временных файлов")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Количество строк, читаемых за один раз")
+    parser.add_argument("--max-train-rows", type=int, default=1_000_000, help="Размер выборки для режима sample")
+    parser.add_argument("--modes", type=str, nargs="+", default=["pandas", "memmap", "sample", "warm"], help="Режимы для замера")
+    parser.add_argument("--run", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_once(args.run, args)
+        return
+
+    if os.path.exists(args.model_dir) == False:
+        os.makedirs(args.model_dir)
+
+    modes = sorted(args.modes, key=lambda mode: mode != "pandas")
+    for mode in modes:
+        process = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", mode, *sys.argv[1:]], stdout=subprocess.PIPE, text=True, check=True)
+        result = json.loads(process.stdout.splitlines()[-1])
+
+        if result["peak_rss"] != None:
+            memory = f"пиковая память {result['peak_rss'] / 2**20:.0f} МБ ( +{(result['peak_rss'] - result['baseline']) / 2**20:.0f} МБ после импортов )"
+        else:
+            memory = "пиковая память н/д"
+        print(f"{mode}: {result['rows']} строк, обучение {result['fit_time']:.2f} сек, {memory}")
+
+if __name__ == "__main__":
+    main()
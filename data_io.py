@@ -0,0 +1,290 @@
+import heapq
+import os
+import numpy as np
+import pandas as pd
+from preprocess import USED_COLUMNS
+from profiler import profile_iter, stage
+
+## \brief Поддерживаемые форматы файлов с клиентами и предсказаниями
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Формат определяется по расширению файла. Расширения .feather и .arrow обозначают один и тот же формат Arrow IPC
+FORMATS = {
+    ".csv": "csv",
+    ".xlsx": "xlsx",
+    ".parquet": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather"
+}
+
+## \brief Форматы, которые можно читать и записывать по частям
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+STREAMING_FORMATS = ["csv", "parquet"]
+
+## \brief Столбцы, которые читаются из файла с клиентами
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Кроме признаков из preprocess.USED_COLUMNS читается только CustomerID, который нужен для файла с предсказаниями. Остальные столбцы ( например, Tenure и Last Interaction ) не загружаются
+CLIENT_COLUMNS = ["CustomerID"] + USED_COLUMNS
+
+## \brief Пользовательское исключение
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Исключение создано для создания ошибки при передаче файла неподдерживаемого формата. Ниже пример кода с использованием исключения
+## \code
+# if extension not in FORMATS:
+#     raise UnsupportedFormatError(f"Файл [{fpath}] не является файлом формата [.CSV|.XLSX|.PARQUET|.FEATHER|.ARROW]")
+## \endcode
+class UnsupportedFormatError (Exception): pass
+
+## \brief Функция определения формата файла по расширению
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] fpath Путь до файла
+## \param[in] streaming Аргумент определяет, что формат должен поддерживать чтение и запись по частям. По умолчанию = False
+## \return Строка с названием формата из словаря FORMATS
+def get_format (fpath: str, streaming: bool=False) -> str:
+    extension = os.path.splitext(fpath)[1].lower()
+
+    if extension not in FORMATS:
+        raise UnsupportedFormatError(f"Файл [{fpath}] не является файлом формата [.CSV|.XLSX|.PARQUET|.FEATHER|.ARROW]")
+    if streaming and FORMATS[extension] not in STREAMING_FORMATS:
+        raise UnsupportedFormatError(f"Потоковая обработка поддерживает только файлы формата [.CSV|.PARQUET], получен [{fpath}]")
+
+    return FORMATS[extension]
+
+## \brief Функция проверки того, что файл имеет поддерживаемый формат
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] fpath Путь до файла
+## \return True, если формат файла поддерживается, иначе False
+def is_supported (fpath: str) -> bool:
+    return os.path.splitext(fpath)[1].lower() in FORMATS
+
+## \brief Функция выбора столбцов для чтения из .CSV и .XLSX
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \param[in] fpath Путь до файла
+## \param[in] file_format Формат файла из функции get_format
+## \param[in] columns Список нужных столбцов
+## \details Первый столбец файлов .CSV и .XLSX является индексом, поэтому он читается всегда. Его имя берется из заголовка файла, поэтому индекс с любым именем ( например, row ) не отбрасывается
+## \return Функция для аргумента usecols
+def _usecols (fpath: str, file_format: str, columns: list[str]):
+    if file_format == "csv":
+        index_name = pd.read_csv(fpath, nrows=0).columns[0]
+    else:
+        index_name = pd.read_excel(fpath, nrows=0).columns[0]
+
+    columns = set(columns)
+    return lambda column: column == index_name or column in columns
+
+## \brief Функция чтения данных клиентов
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \param[in] fpath Путь до данных клиентов в формате [.CSV|.XLSX|.PARQUET|.FEATHER|.ARROW]
+## \param[in] columns Список читаемых столбцов. По умолчанию = CLIENT_COLUMNS. Если None, то читаются все столбцы
+## \details Для .PARQUET и .FEATHER столбцы, которые не нужны, не читаются с диска вовсе
+## \details Чтение записывается в профилировщик как этап read
+## \return DataFrame с данными клиентов
+def read_clients (fpath: str, columns: list[str]=CLIENT_COLUMNS) -> pd.DataFrame:
+    file_format = get_format(fpath)
+    usecols = _usecols(fpath, file_format, columns) if columns != None and file_format in ["csv", "xlsx"] else None
+
+    with stage("read") as info:
+        if file_format == "csv":
+            clients_data = pd.read_csv(fpath, index_col=[0], usecols=usecols)
+        elif file_format == "xlsx":
+            clients_data = pd.read_excel(fpath, index_col=[0], usecols=usecols)
+        elif file_format == "parquet":
+            clients_data = pd.read_parquet(fpath, columns=columns)
+        else:
+            clients_data = pd.read_feather(fpath, columns=columns)
+        info["rows"] = len(clients_data)
+
+    return clients_data
+
+## \brief Функция чтения данных клиентов по частям
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \param[in] fpath Путь до данных клиентов в формате [.CSV|.PARQUET]
+## \param[in] chunksize Количество строк в одной части
+## \param[in] columns Список читаемых столбцов. По умолчанию = CLIENT_COLUMNS
+## \details Файл .PARQUET читается пакетами pyarrow, поэтому в памяти находится только одна часть. Чтение каждой части записывается в профилировщик как этап read
+## \return Генератор DataFrame с частями данных клиентов
+def iter_clients (fpath: str, chunksize: int, columns: list[str]=CLIENT_COLUMNS):
+    file_format = get_format(fpath, streaming=True)
+
+    if file_format == "csv":
+        chunks = pd.read_csv(fpath, index_col=[0], usecols=_usecols(fpath, file_format, columns), chunksize=chunksize)
+    else:
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(fpath)
+        index_columns = [column for column in parquet_file.schema_arrow.pandas_metadata["index_columns"] if isinstance(column, str)] if parquet_file.schema_arrow.pandas_metadata else []
+        chunks = (batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns + index_columns))
+
+    yield from profile_iter("read", chunks)
+
+## \brief Класс записи предсказаний в файл
+## \authors ivan-dev-lab
+## \version 1.2.0
+## \date 18.10.2026
+## \details Файлы .CSV и .PARQUET дописываются по частям при каждом вызове write. Форматы .XLSX и .FEATHER не поддерживают дозапись, поэтому части накапливаются и записываются одним вызовом при close
+## \details Пример использования:
+## \code
+# with PredictionWriter("pred.parquet") as writer:
+#     for chunk in iter_clients("clients.parquet", chunksize=100_000):
+#         writer.write(predict_frame(pipeline, chunk))
+## \endcode
+class PredictionWriter:
+    ## \brief Конструктор класса
+    ## \param[in] fpath Путь до файла с предсказаниями в формате [.CSV|.XLSX|.PARQUET|.FEATHER|.ARROW]
+    ## \param[in] index Аргумент определяет запись индекса DataFrame в файл. По умолчанию = True
+    def __init__ (self, fpath: str, index: bool=True):
+        self.fpath = fpath
+        self.index = index
+        self.file_format = get_format(fpath)
+        self.rows = 0
+        self._frames = []
+        self._parquet_writer = None
+
+    ## \brief Функция записи части предсказаний
+    ## \param[in] result DataFrame с предсказаниями
+    ## \return None
+    def write (self, result: pd.DataFrame) -> None:
+        with stage("write", len(result)):
+            if self.file_format == "csv":
+                result.to_csv(self.fpath, mode="w" if self.rows == 0 else "a", header=self.rows == 0, index=self.index)
+            elif self.file_format == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                if self._parquet_writer == None:
+                    table = pa.Table.from_pandas(result, preserve_index=None if self.index else False)
+                    self._parquet_writer = pq.ParquetWriter(self.fpath, table.schema)
+                else:
+                    table = pa.Table.from_pandas(result, schema=self._parquet_writer.schema, preserve_index=None if self.index else False)
+                self._parquet_writer.write_table(table)
+            else:
+                self._frames.append(result)
+
+        self.rows += len(result)
+
+    ## \brief Функция завершения записи
+    ## \return None
+    def close (self) -> None:
+        if self._parquet_writer != None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        elif len(self._frames) > 0:
+            with stage("write"):
+                result = pd.concat(self._frames)
+                if self.file_format == "xlsx":
+                    result.to_excel(self.fpath, index=self.index)
+                else:
+                    (result.reset_index() if self.index else result.reset_index(drop=True)).to_feather(self.fpath)
+            self._frames = []
+
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, *exc_info):
+        self.close()
+
+## \brief Класс записи K строк с наибольшим значением столбца
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \details Класс имеет те же методы, что и PredictionWriter, но хранит только K лучших строк в куче heapq ограниченного размера. Из каждой части в кучу попадают только строки, которые больше ее минимума, а сами кандидаты части выбираются через np.partition, поэтому память зависит только от K и размера части, а полная сортировка всех предсказаний не выполняется
+## \details При одинаковых значениях выше оказывается строка, записанная раньше. Строки с пустым значением пропускаются. При close строки записываются в файл по убыванию значения
+## \details Пример использования:
+## \code
+# with TopKWriter("top.csv", k=1000, by="Вероятность ухода") as writer:
+#     for chunk in iter_clients("clients.csv", chunksize=100_000):
+#         writer.write(predict_frame(pipeline, chunk, proba=True))
+## \endcode
+class TopKWriter:
+    ## \brief Конструктор класса
+    ## \param[in] fpath Путь до файла с предсказаниями в формате [.CSV|.XLSX|.PARQUET|.FEATHER|.ARROW]
+    ## \param[in] k Количество строк, которые будут записаны в файл
+    ## \param[in] by Название числового столбца, по которому выбираются строки
+    def __init__ (self, fpath: str, k: int, by: str):
+        get_format(fpath)
+
+        self.fpath = fpath
+        self.k = k
+        self.by = by
+        self.rows = 0
+        self._heap = []
+        self._columns = None
+        self._index_name = None
+
+    ## \brief Функция обработки части предсказаний
+    ## \param[in] result DataFrame с предсказаниями
+    ## \return None
+    def write (self, result: pd.DataFrame) -> None:
+        with stage("top_k", len(result)):
+            self._push(result)
+
+        self.rows += len(result)
+
+    ## \brief Функция добавления строк части в кучу
+    ## \param[in] result DataFrame с предсказаниями
+    ## \return None
+    def _push (self, result: pd.DataFrame) -> None:
+        if self._columns == None:
+            self._columns, self._index_name = list(result.columns), result.index.name
+
+        values = result[self.by].to_numpy(dtype=np.float64)
+        candidates = np.flatnonzero(~np.isnan(values))
+
+        if len(self._heap) == self.k:
+            candidates = candidates[values[candidates] > self._heap[0][0]]
+        if len(candidates) > self.k:
+            kth = -np.partition(-values[candidates], self.k - 1)[self.k - 1]
+            above = candidates[values[candidates] > kth]
+            ties = candidates[values[candidates] == kth][:self.k - len(above)]
+            candidates = np.sort(np.concatenate([above, ties]))
+
+        rows = result.iloc[candidates]
+        for i, index, row in zip(candidates, rows.index, rows.itertuples(index=False, name=None)):
+            item = (values[i], -(self.rows + i), index, row)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, item)
+            elif item > self._heap[0]:
+                heapq.heapreplace(self._heap, item)
+
+    ## \brief Функция записи K строк в файл
+    ## \return None
+    def close (self) -> None:
+        top = sorted(self._heap, reverse=True)
+        result = pd.DataFrame([item[3] for item in top], columns=self._columns, index=pd.Index([item[2] for item in top], name=self._index_name))
+
+        write_predictions(result, self.fpath)
+
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, *exc_info):
+        self.close()
+
+## \brief Функция записи предсказаний в файл
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] result DataFrame с предсказаниями
+## \param[in] fpath Путь до файла с предсказаниями в формате [.CSV|.XLSX|.PARQUET|.FEATHER|.ARROW]
+## \return None
+def write_predictions (result: pd.DataFrame, fpath: str) -> None:
+    with PredictionWriter(fpath) as writer:
+        writer.write(result)
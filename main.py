@@ -1,10 +1,5 @@
 import argparse
 import os
-import re
-import joblib
-import pandas as pd
-from sklearn.ensemble import HistGradientBoostingClassifier
-from preprocess import preprocess
 
 ## \brief Пользовательское исключение
 ## \authors ivan-dev-lab
@@ -19,50 +14,102 @@ class IncorrectNumberOfArgumentsError (Exception): pass
 
 ## \brief Функция-коммуникатор между пользователем и моделью
 ## \authors ivan-dev-lab
-## \version 1.2.2
-## \date 24.08.2023
+## \version 1.9.1
+## \date 18.10.2026
 ## \details Функция обеспечивает коммуникацию между моделью и пользователем путем создания флагов для комадной строки
 ## \returns Пространство имен argparse.Namespace
 def make_communication () -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Keeper_AI - Cистема классификации клиентов.")
 
     data_arg_group = parser.add_argument_group(title="Сохранение и загрузка данных", description="Если не указывать флаг --pred, то данные с предсказаниями будут загружаться в C:/Users/User/Keeper_AI-work/clients_preprocessed.csv")
-    data_arg_group.add_argument("--clients", type=str, help="Путь до исходных данных в формате [.CSV|.XLSX]", required=True) 
-    data_arg_group.add_argument("--pred", type=str, help="Путь до предполагаемого файла в формате [.CSV|.XLSX] с конечными данными", default="C:/Users/User/Keeper_AI-work/clients_preprocessed.csv")
+    data_arg_group.add_argument("--clients", type=str, help="Путь до исходных данных в формате [.CSV|.XLSX|.PARQUET|.FEATHER|.ARROW], каталог с такими файлами или шаблон glob ( например, data/clients_*.csv )", required=True) 
+    data_arg_group.add_argument("--pred", type=str, help="Путь до предполагаемого файла в формате [.CSV|.XLSX|.PARQUET|.FEATHER|.ARROW] с конечными данными", default="C:/Users/User/Keeper_AI-work/clients_preprocessed.csv")
+    data_arg_group.add_argument("--chunksize", type=int, help="Количество строк, обрабатываемых за один раз. Если указан, то файл [.CSV|.PARQUET] с клиентами читается и записывается по частям, не загружаясь в память целиком", default=None)
+    data_arg_group.add_argument("--workers", type=int, help="Количество процессов для параллельной предобработки и предсказаний. По умолчанию = 1", default=1)
+    data_arg_group.add_argument("--cache", action="store_true", help="Флаг включает кэш предсказаний: клиенты, у которых не изменились признаки, не проходят повторно через модель. Весь кэш хранится в памяти, поэтому расход памяти пропорционален количеству клиентов. Не используется вместе с --workers")
+    data_arg_group.add_argument("--proba", action="store_true", help="Флаг добавляет в предсказания столбец с вероятностью ухода клиента")
+    data_arg_group.add_argument("--top-k", type=int, help="Количество клиентов с наибольшей вероятностью ухода. Если указан, то в файл --pred записываются только эти клиенты по убыванию вероятности", default=None)
+
+    profile_arg_group = parser.add_argument_group(title="Профилирование", description="Замер времени, количества строк, скорости, расхода памяти в конце этапа и пика памяти внутри этапа на каждом этапе: load_model, train, read, preprocess, predict, top_k, write, cache_lookup, cache_save")
+    profile_arg_group.add_argument("--profile", action="store_true", help="Флаг включает вывод таблицы этапов после работы")
+    profile_arg_group.add_argument("--profile-trace", type=str, help="Путь до файла .JSON для сохранения этапов в формате Chrome Trace ( chrome://tracing, ui.perfetto.dev ). Включает --profile", default=None)
+    profile_arg_group.add_argument("--profile-cprofile", type=str, help="Путь до файла для сохранения статистики cProfile ( pstats, snakeviz ). Включает --profile", default=None)
 
     train_arg_group = parser.add_argument_group(title="Тренировка моделей", description="При тренировки модели для предсказаний и моделей для оценки, будут использоваться данные по-умолчанию из каталога Keeper_AI/data/train.csv")
     train_arg_group.add_argument("--train", action="store_true", help="Флаг определяет необходимость обучения моделей")
+    train_arg_group.add_argument("--train-mode", type=str, choices=["pandas", "memmap", "sample"], help="Режим обучения: pandas - файл читается целиком, memmap - признаки читаются по частям в матрицу на диске, но модель копирует ее в память, sample - по частям читается стратифицированная выборка, расход памяти ограничен ее размером ( для больших файлов ). По умолчанию = pandas. С флагом --warm-start режим pandas заменяется на memmap", default=None)
+    train_arg_group.add_argument("--max-train-rows", type=int, help="Размер выборки для --train-mode sample. По умолчанию = 1000000", default=None)
+    train_arg_group.add_argument("--warm-start", action="store_true", help="Флаг включает дообучение сохраненной модели на тренировочных данных вместо обучения с нуля")
     
     return parser.parse_args()
 
 ## \brief Функция проверки введенных аргументов 
 ## \authors ivan-dev-lab
-## \version 1.0.0
-## \date 23.08.2023
+## \version 1.7.0
+## \date 18.10.2026
 ## \details Функция проверят корректность введенных аргументов при запуске программы из командной строки.
-## \details Проверятся существование файла только для флага --clients, во всех остальных случаях используются регулярные выражения
+## \details Модули с pandas импортируются только после разбора аргументов, поэтому --help и ошибки в аргументах выводятся сразу
+## \details Проверятся существование файлов только для флага --clients ( файла, каталога или файлов по шаблону glob ), для флага --pred проверяется расширение файла
 ## \returns Словарь dict() с именами и значениями полученных аргументов
 def create_request () -> dict:
     args = make_communication ()
     request = {}
 
+    from data_io import is_supported
+    from scoring import list_partitions
+
     for arg in args._get_kwargs():
-        if arg[0] == "clients" and os.path.exists(arg[1]):
+        if arg[0] == "clients" and len(list_partitions(arg[1])) > 0:
             request["clients"] = arg[1].replace("\\", '/')
         elif arg[0] == "train":
             request["train"] = arg[1]
-        if arg[0] == "pred" and re.match(r"\S*/*\.(csv|xlsx)", arg[1]) != None:
+        if arg[0] == "pred" and is_supported(arg[1]):
             request["pred"] = arg[1].replace("\\", '/')
+        elif arg[0] == "chunksize":
+            request["chunksize"] = arg[1] if arg[1] != None and arg[1] > 0 else None
+        elif arg[0] == "workers":
+            request["workers"] = max(arg[1], 1)
+        elif arg[0] == "cache":
+            request["cache"] = arg[1]
+        elif arg[0] == "proba":
+            request["proba"] = arg[1]
+        elif arg[0] == "top_k":
+            request["top_k"] = arg[1] if arg[1] != None and arg[1] > 0 else None
+        elif arg[0] == "max_train_rows":
+            request["max_train_rows"] = arg[1] if arg[1] != None and arg[1] > 0 else None
+        elif arg[0] == "warm_start":
+            request["warm_start"] = arg[1]
+        elif arg[0] in ["profile_trace", "profile_cprofile"]:
+            request[arg[0]] = arg[1]
+
+    request["profile"] = args.profile or args.profile_trace != None or args.profile_cprofile != None
+
+    request["train_mode"] = args.train_mode if args.train_mode != None and (args.train_mode != "pandas" or args.warm_start == False) else ("memmap" if args.warm_start else "pandas")
 
     return request
 
-## \brief Главная функция в которой собраны все остальные функци проекта
+## \brief Функция обучения модели и предсказаний по запросу пользователя
 ## \authors ivan-dev-lab
-## \version 2.1.0
-## \date 24.08.2023
+## \version 1.1.1
+## \date 18.10.2026
+## \param[in] request Словарь с аргументами из функции create_request
+## \details Раньше код функции находился в main. Он вынесен, чтобы main могла выполнить его внутри профилировщика
+## \details Модель вместе с обученной предобработкой хранится в реестре моделей model_registry.ModelRegistry в каталоге model. Если в реестре есть текущая версия и флаг --train не указан, то тренировочные данные не читаются, а массивы модели загружаются через np.memmap
+## \details После обучения конвейер регистрируется в реестре вместе с признаками, хэшем файла data/train.csv, количеством строк, временем обучения и временем загрузки в новом процессе ( cold_load_time ) и становится текущей версией. В реестре остаются текущая и REGISTRY_KEEP предыдущих версий
+## \details Если реестра еще нет, то используется файл model/pipeline.pkl, а если найден только файл старого формата model/HistGradientBoostingClassifier.pkl, то модель загружается из него, а по тренировочным данным один раз обучается только предобработка
+## \details При --train-mode memmap или sample тренировочные данные читаются частями функцией training.fit_streaming_pipeline. С флагом --warm-start текущая версия дообучается новыми итерациями бустинга. После обучения выводятся время обучения и пиковый расход памяти процесса
+## \details При указанном флаге --chunksize предсказания выполняются потоково функцией scoring.score_chunks
+## \details При --workers больше 1 или нескольких файлах с клиентами предсказания выполняются в пуле процессов функцией scoring.score_parallel
+## \details При указанном флаге --cache исходы для клиентов с неизменными признаками берутся из кэша model/prediction_cache, который привязан к версии модели
+## \details При флаге --top-k в файл записываются только top_k клиентов с наибольшей вероятностью ухода. Они отбираются кучей ограниченного размера по мере обработки частей, поэтому полный файл с предсказаниями не создается и не сортируется
+## \details Тяжелые модули импортируются только там, где они нужны: sklearn.ensemble - только при обучении модели, кэш предсказаний - только с флагом --cache. TensorFlow в предсказаниях не используется
 ## \returns None
-def main ():
-    request = create_request ()
+def run (request: dict) -> None:
+    from pipeline import PIPELINE_FILENAME, fit_pipeline, load_pipeline
+    from model_registry import REGISTRY_KEEP, ModelRegistry, hash_file
+    from data_io import read_clients
+    from scoring import list_partitions, open_writer, predict_frame, score_chunks, score_parallel
+    from profiler import peak_rss, stage
 
     DEST_DIR = request["pred"].split("/")
     DEST_DIR.pop()
@@ -71,47 +118,112 @@ def main ():
     if os.path.exists(DEST_DIR) == False:
         os.makedirs(DEST_DIR)
 
-    clients_data, clients_data_prep = None, None
+    MODEL_DIR = f"{DEST_DIR}/model"
+    PIPELINE_PATH = f"{MODEL_DIR}/{PIPELINE_FILENAME}"
+    LEGACY_MODEL_PATH = f"{MODEL_DIR}/HistGradientBoostingClassifier.pkl"
 
-    if request['clients'].find(".csv") != -1:
-        clients_data = pd.read_csv(request["clients"], index_col=[0])
-        clients_data_prep = preprocess(clients_data.copy(), data_type="test")
+    if os.path.exists(MODEL_DIR) == False:
+        os.makedirs(MODEL_DIR)
 
-    elif request['clients'].find(".xlsx") != -1:
-        clients_data = pd.read_excel(request["clients"], index_col=[0])
-        clients_data_prep = preprocess(clients_data.copy(), data_type="test")
-    
-    clients_data = clients_data[["CustomerID"]]
- 
-    train_data = pd.read_csv("data/train.csv")
-    X,Y = preprocess(train_data, data_type="train")
-    
-    model = HistGradientBoostingClassifier()
-
-    if os.path.exists(DEST_DIR+"/model/") == False:
-        os.makedirs(DEST_DIR+"/model/")
+    registry = ModelRegistry(MODEL_DIR)
 
-    if request['train']:
-        model.fit(X, Y)
-        joblib.dump(model, f"{DEST_DIR}/model/HistGradientBoostingClassifier.pkl")
+    if request['train'] == False and request['warm_start'] == False and registry.current() != None:
+        pipeline = registry.load()
+    elif request['train'] == False and request['warm_start'] == False and os.path.exists(PIPELINE_PATH):
+        pipeline = load_pipeline(PIPELINE_PATH)
     else:
-        if os.path.exists(f"{DEST_DIR}/model/HistGradientBoostingClassifier.pkl"):
-            model = joblib.load(f"{DEST_DIR}/model/HistGradientBoostingClassifier.pkl")
+        import time
+        import joblib
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        from training import TRAIN_CHUNKSIZE, TRAIN_SAMPLE_ROWS, fit_streaming_pipeline
+
+        start = time.perf_counter()
+
+        if request['warm_start']:
+            if registry.current() != None:
+                previous = registry.load(mmap=False)
+            elif os.path.exists(PIPELINE_PATH):
+                previous = load_pipeline(PIPELINE_PATH)
+            elif os.path.exists(LEGACY_MODEL_PATH):
+                previous = {"model": joblib.load(LEGACY_MODEL_PATH)}
+            else:
+                raise FileNotFoundError(f"Для --warm-start не найдена сохраненная модель в каталоге [{MODEL_DIR}]")
         else:
-            model.fit(X, Y)
-            joblib.dump(model, f"{DEST_DIR}/model/HistGradientBoostingClassifier.pkl")
-
-    churn_df = pd.DataFrame(data=model.predict(clients_data_prep), columns=["Исход"])
-    churn_df.replace({1: "Ушел", 0: "Остался"}, inplace=True)
+            previous = None
+
+        with stage("train") as info:
+            if request['train_mode'] != "pandas":
+                pipeline, train_rows = fit_streaming_pipeline("data/train.csv", HistGradientBoostingClassifier(), request['train_mode'], chunksize=request['chunksize'] or TRAIN_CHUNKSIZE, max_rows=request['max_train_rows'] or TRAIN_SAMPLE_ROWS, work_dir=MODEL_DIR, previous=previous)
+            else:
+                import pandas as pd
+
+                train_data = pd.read_csv("data/train.csv")
+                train_rows = len(train_data)
+
+                if request['train'] == False and os.path.exists(LEGACY_MODEL_PATH):
+                    pipeline = fit_pipeline(train_data, joblib.load(LEGACY_MODEL_PATH), fit_model=False)
+                else:
+                    pipeline = fit_pipeline(train_data, HistGradientBoostingClassifier())
+
+            info["rows"] = train_rows
+
+        fit_time = time.perf_counter() - start
+        metrics = {"train_rows": train_rows, "train_mode": request['train_mode'], "fit_time": fit_time}
+        registry.register(pipeline, type(pipeline["model"]).__name__, version=pipeline["version"], features=pipeline["encoder"].feature_names_, data_hash=hash_file("data/train.csv"), metrics=metrics, parent=previous.get("version") if previous != None else None, cold_load=True)
+        registry.promote(pipeline["version"])
+        registry.prune(REGISTRY_KEEP)
+
+        report = f"Обучение ( режим {request['train_mode']} ): {train_rows} строк за {fit_time:.2f} сек"
+        memory = peak_rss()
+        print(report + (f", пиковая память {memory / 2**20:.0f} МБ" if memory != None else ""))
+
+    cache = None
+    if request['cache']:
+        from prediction_cache import PredictionCache
+        cache = PredictionCache(f"{MODEL_DIR}/prediction_cache", pipeline["version"])
+
+    proba = request['proba'] or request['top_k'] != None
+
+    if request['workers'] > 1 or len(list_partitions(request["clients"])) > 1:
+        with stage("score_parallel") as info:
+            stats = score_parallel(pipeline, request["clients"], request["pred"], request["workers"], request["chunksize"], proba=proba, top_k=request['top_k'])
+            info["rows"] = sum(worker_rows for worker_rows, _ in stats.values())
+        cache = None
+    elif request['chunksize'] != None:
+        score_chunks(pipeline, request["clients"], request["pred"], request["chunksize"], cache=cache, proba=proba, top_k=request['top_k'])
+    else:
+        clients_data = read_clients(request["clients"])
+        clients_data = cache.predict(pipeline, clients_data, proba=proba) if cache != None else predict_frame(pipeline, clients_data, proba=proba)
 
-    clients_data["Исход"] = churn_df
+        with open_writer(request["pred"], request['top_k']) as writer:
+            writer.write(clients_data)
 
-    if request['pred'].find(".csv") != -1:
-        clients_data.to_csv(request['pred'])
-    elif request['pred'].find(".xlsx") != -1:
-        clients_data.to_excel(request['pred'])
+    if cache != None:
+        cache.save()
+        cache.report()
     
     print(f"Анализ данных закончен.\nФайл с предсказаниями системы находится по адресу {request['pred']}")
 
+## \brief Главная функция в которой собраны все остальные функци проекта
+## \authors ivan-dev-lab
+## \version 3.0.0
+## \date 18.10.2026
+## \details Аргументы разбираются функцией create_request, а обучение и предсказания выполняются функцией run
+## \details С флагом --profile функция run выполняется внутри profiler.Profiler, после чего выводится таблица этапов. С флагом --profile-trace этапы сохраняются в файл формата Chrome Trace, а с флагом --profile-cprofile весь запуск дополнительно профилируется cProfile
+## \returns None
+def main ():
+    request = create_request ()
+
+    from profiler import Profiler
+
+    with Profiler(enabled=request['profile'], cprofile_path=request['profile_cprofile']) as profiler:
+        run(request)
+
+    if request['profile_trace'] != None:
+        profiler.save(request['profile_trace'])
+        print(f"Этапы сохранены в {request['profile_trace']}")
+    if request['profile']:
+        profiler.summary()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
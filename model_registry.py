@@ -0,0 +1,294 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+import joblib
+from profiler import stage
+
+## \brief Имя файла с версией текущей модели в каталоге реестра
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+CURRENT_FILENAME = "CURRENT"
+
+## \brief Количество версий, которые хранятся в реестре по умолчанию при вызове prune
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+REGISTRY_KEEP = 3
+
+## \brief Пользовательское исключение
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Исключение создано для создания ошибки при обращении к версии модели, которой нет в реестре. Ниже пример кода с использованием исключения
+## \code
+# if os.path.exists(f"{self.root}/versions/{version}/metadata.json") == False:
+#     raise VersionNotFoundError(f"Версии [{version}] нет в реестре [{self.root}]")
+## \endcode
+class VersionNotFoundError (Exception): pass
+
+## \brief Пользовательское исключение
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Исключение создано для создания ошибки при регистрации версии, которая уже есть в реестре. Версии не заменяются на месте: новую модель нужно зарегистрировать с новой версией и назначить текущей через promote
+## \code
+# if os.path.exists(self._path(version)):
+#     raise VersionExistsError(f"Версия [{version}] уже есть в реестре [{self.root}]")
+## \endcode
+class VersionExistsError (Exception): pass
+
+## \brief Функция расчета хэша файла
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] fpath Путь до файла
+## \details Файл читается блоками по 1 МБ, поэтому хэш тренировочных данных любого размера считается без загрузки файла в память
+## \return Строка с хэшем sha256
+def hash_file (fpath: str) -> str:
+    file_hash = hashlib.sha256()
+
+    with open(fpath, "rb") as file:
+        for block in iter(lambda: file.read(2**20), b""):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
+
+## \brief Функция проверки того, что модель является моделью Keras
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] model Модель
+## \details Проверяется только модуль класса модели, поэтому TensorFlow для проверки не импортируется
+## \return True, если модель из keras или tensorflow, иначе False
+def _is_keras (model) -> bool:
+    return type(model).__module__.split(".")[0] in ["keras", "tensorflow", "tf_keras"]
+
+## \brief Функция чтения файла модели
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] fpath Путь до файла модели
+## \param[in] file_format Формат файла: "joblib" или "keras"
+## \param[in] mmap Аргумент определяет загрузку массивов через np.memmap
+## \return Модель
+def _read_artifact (fpath: str, file_format: str, mmap: bool):
+    if file_format == "keras":
+        from keras.models import load_model
+        return load_model(fpath)
+
+    return joblib.load(fpath, mmap_mode="r" if mmap else None)
+
+## \brief Функция замера времени загрузки модели в новом процессе
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] fpath Путь до файла модели
+## \param[in] file_format Формат файла: "joblib" или "keras"
+## \param[in] mmap Аргумент определяет загрузку массивов через np.memmap
+## \details В новом процессе sklearn и TensorFlow еще не импортированы, поэтому замер включает их импорт, как при запуске main.py или server.py. Время запуска самого интерпретатора не входит в замер. Файл при этом может оставаться в кэше страниц системы
+## \return Время загрузки в секундах
+def measure_cold_load (fpath: str, file_format: str, mmap: bool) -> float:
+    code = "\n".join([
+        "import sys, time",
+        f"sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})",
+        "start = time.perf_counter()",
+        "from model_registry import _read_artifact",
+        f"_read_artifact({os.path.abspath(fpath)!r}, {file_format!r}, {mmap!r})",
+        "print(time.perf_counter() - start)"
+    ])
+    process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    return float(process.stdout.splitlines()[-1])
+
+## \brief Класс реестра моделей
+## \authors ivan-dev-lab
+## \version 1.1.1
+## \date 18.10.2026
+## \details Каждая версия модели хранится в отдельном каталоге versions/<version> и содержит файл модели и metadata.json:
+## <ol>
+## <li><b>name</b>, <b>version</b>, <b>created</b> - название модели, версия и время регистрации</li>
+## <li><b>features</b> - список признаков, на которых обучена модель</li>
+## <li><b>data_hash</b> - хэш тренировочных данных</li>
+## <li><b>metrics</b> - метрики и измерения модели, например mse или время обучения</li>
+## <li><b>format</b>, <b>mmap</b>, <b>size</b> - формат файла, возможность загрузки через np.memmap и размер файлов в байтах</li>
+## <li><b>warm_load_time</b> - время загрузки в секундах в процессе, где модель была сохранена: модули уже импортированы, а файл находится в кэше. Это нижняя граница времени загрузки</li>
+## <li><b>cold_load_time</b> - время загрузки в секундах в новом процессе вместе с импортом sklearn или TensorFlow ( функция measure_cold_load ), если при регистрации указан cold_load=True, иначе None</li>
+## </ol>
+## \details Модели sklearn и конвейеры сохраняются через joblib. Без сжатия ( compress=0 ) массивы numpy внутри модели загружаются через np.memmap, т.е. загрузка почти мгновенна, а данные читаются с диска только при предсказании. Со сжатием файл занимает в несколько раз меньше места, но загружается целиком. Модели Keras сохраняются в собственном формате .keras, а не через pickle
+## \details Версия сначала записывается во временный каталог, который затем переименовывается, а текущая версия хранится в файле CURRENT, который заменяется через os.replace. Зарегистрированная версия больше не изменяется: повторная регистрация той же версии вызывает VersionExistsError, а новая модель получает новую версию. Поэтому другой процесс никогда не увидит недописанную или отсутствующую версию или пустой CURRENT
+## \details Пример использования:
+## \code
+# registry = ModelRegistry("model")
+# metadata = registry.register(pipeline, "HistGradientBoostingClassifier", version=pipeline["version"], features=pipeline["encoder"].feature_names_)
+# registry.promote(metadata["version"])
+# pipeline = registry.load()
+## \endcode
+class ModelRegistry:
+    ## \brief Конструктор класса
+    ## \param[in] root Каталог реестра. Создается при первой регистрации модели
+    def __init__ (self, root: str):
+        self.root = root
+        self._loaded = {}
+
+    ## \brief Функция получения пути до каталога версии
+    ## \param[in] version Версия модели
+    ## \return Путь до каталога
+    def _path (self, version: str) -> str:
+        return f"{self.root}/versions/{version}"
+
+    def __contains__ (self, version: str) -> bool:
+        return os.path.exists(f"{self._path(version)}/metadata.json")
+
+    ## \brief Функция получения метаданных версии
+    ## \param[in] version Версия модели
+    ## \return Словарь dict() с метаданными
+    def metadata (self, version: str) -> dict:
+        if version not in self:
+            raise VersionNotFoundError(f"Версии [{version}] нет в реестре [{self.root}]")
+
+        with open(f"{self._path(version)}/metadata.json", encoding="utf-8") as file:
+            return json.load(file)
+
+    ## \brief Функция получения списка версий
+    ## \param[in] name Название модели. Если указано, то возвращаются только версии этой модели. По умолчанию = None
+    ## \return Список list() с метаданными версий от старых к новым
+    def versions (self, name: str=None) -> list[dict]:
+        if os.path.exists(f"{self.root}/versions") == False:
+            return []
+
+        versions = [self.metadata(version) for version in os.listdir(f"{self.root}/versions") if version.startswith(".") == False and version in self]
+        return sorted([metadata for metadata in versions if name == None or metadata["name"] == name], key=lambda metadata: metadata["created"])
+
+    ## \brief Функция регистрации модели
+    ## \param[in] model Модель или конвейер из pipeline.fit_pipeline
+    ## \param[in] name Название модели
+    ## \param[in] version Версия модели. По умолчанию = None ( случайный uuid )
+    ## \param[in] features Список признаков модели. По умолчанию = None
+    ## \param[in] data_hash Хэш тренировочных данных. По умолчанию = None
+    ## \param[in] metrics Словарь с метриками модели. По умолчанию = None
+    ## \param[in] compress Уровень сжатия joblib от 0 до 9. При 0 модель загружается через np.memmap. По умолчанию = 0
+    ## \param[in] parent Версия, от которой получена модель, например при дообучении. По умолчанию = None
+    ## \param[in] cold_load Аргумент определяет замер времени загрузки в новом процессе ( cold_load_time ). Замер занимает время импорта sklearn, поэтому по умолчанию = False
+    ## \details Если версия уже есть в реестре, то вызывается VersionExistsError. После записи модель один раз загружается, чтобы сохранить warm_load_time в метаданные
+    ## \return Словарь dict() с метаданными версии
+    def register (self, model, name: str, version: str=None, features: list[str]=None, data_hash: str=None, metrics: dict=None, compress: int=0, parent: str=None, cold_load: bool=False) -> dict:
+        version = version if version != None else uuid.uuid4().hex
+        if os.path.exists(self._path(version)):
+            raise VersionExistsError(f"Версия [{version}] уже есть в реестре [{self.root}]")
+
+        tmp_path = f"{self.root}/versions/.{version}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(tmp_path)
+
+        with stage("save_model"):
+            if _is_keras(model):
+                file_format, fname = "keras", "model.keras"
+                model.save(f"{tmp_path}/{fname}")
+            else:
+                file_format, fname = "joblib", "model.joblib"
+                joblib.dump(model, f"{tmp_path}/{fname}", compress=compress)
+
+        metadata = {
+            "name": name,
+            "version": version,
+            "created": datetime.datetime.now().isoformat(timespec="microseconds"),
+            "parent": parent,
+            "features": list(features) if features is not None else None,
+            "data_hash": data_hash,
+            "metrics": metrics or {},
+            "format": file_format,
+            "file": fname,
+            "mmap": file_format == "joblib" and compress == 0,
+            "size": os.path.getsize(f"{tmp_path}/{fname}") if os.path.isfile(f"{tmp_path}/{fname}") else sum(os.path.getsize(f"{directory}/{file}") for directory, _, files in os.walk(f"{tmp_path}/{fname}") for file in files)
+        }
+
+        start = time.perf_counter()
+        _read_artifact(f"{tmp_path}/{fname}", file_format, metadata["mmap"])
+        metadata["warm_load_time"] = time.perf_counter() - start
+        metadata["cold_load_time"] = measure_cold_load(f"{tmp_path}/{fname}", file_format, metadata["mmap"]) if cold_load else None
+
+        with open(f"{tmp_path}/metadata.json", "w", encoding="utf-8") as file:
+            json.dump(metadata, file, ensure_ascii=False, indent=1)
+
+        os.rename(tmp_path, self._path(version))
+
+        return metadata
+
+    ## \brief Функция назначения текущей версии
+    ## \param[in] version Версия модели
+    ## \details Каждый вызов пишет в свой временный файл с uuid в имени, поэтому одновременные promote из разных процессов не портят временные файлы друг друга, а CURRENT получает версию последнего os.replace
+    ## \return None
+    def promote (self, version: str) -> None:
+        if version not in self:
+            raise VersionNotFoundError(f"Версии [{version}] нет в реестре [{self.root}]")
+
+        tmp_path = f"{self.root}/{CURRENT_FILENAME}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(version)
+        os.replace(tmp_path, f"{self.root}/{CURRENT_FILENAME}")
+
+    ## \brief Функция получения текущей версии
+    ## \return Строка с текущей версией или None, если версия еще не назначена
+    def current (self):
+        if os.path.exists(f"{self.root}/{CURRENT_FILENAME}") == False:
+            return None
+
+        with open(f"{self.root}/{CURRENT_FILENAME}", encoding="utf-8") as file:
+            return file.read().strip()
+
+    ## \brief Функция чтения файла модели
+    ## \param[in] fpath Путь до файла модели
+    ## \param[in] metadata Метаданные версии
+    ## \param[in] mmap Аргумент определяет загрузку массивов через np.memmap, если версия это поддерживает. По умолчанию = True
+    ## \return Модель
+    def _read (self, fpath: str, metadata: dict, mmap: bool=True):
+        return _read_artifact(fpath, metadata["format"], mmap and metadata["mmap"])
+
+    ## \brief Функция загрузки модели
+    ## \param[in] version Версия модели. По умолчанию = None ( текущая версия )
+    ## \param[in] mmap Аргумент определяет загрузку массивов через np.memmap. Такие массивы доступны только для чтения, поэтому для дообучения модели нужно указать mmap=False. По умолчанию = True
+    ## \details Загруженные модели запоминаются, поэтому повторная загрузка той же версии не читает файл. Загрузка записывается в профилировщик как этап load_model
+    ## \return Модель или конвейер в том виде, в котором они были зарегистрированы
+    def load (self, version: str=None, mmap: bool=True):
+        version = version if version != None else self.current()
+        if version == None:
+            raise VersionNotFoundError(f"В реестре [{self.root}] нет текущей версии")
+
+        if (version, mmap) not in self._loaded:
+            metadata = self.metadata(version)
+            with stage("load_model"):
+                self._loaded[(version, mmap)] = self._read(f"{self._path(version)}/{metadata['file']}", metadata, mmap)
+
+        return self._loaded[(version, mmap)]
+
+    ## \brief Функция удаления версии
+    ## \param[in] version Версия модели
+    ## \details Текущую версию удалить нельзя
+    ## \return None
+    def remove (self, version: str) -> None:
+        if version == self.current():
+            raise ValueError(f"Версия [{version}] является текущей в реестре [{self.root}] и не может быть удалена")
+
+        self._loaded = {key: model for key, model in self._loaded.items() if key[0] != version}
+        shutil.rmtree(self._path(version), ignore_errors=True)
+
+    ## \brief Функция удаления старых версий
+    ## \param[in] keep Количество последних версий, которые остаются в реестре. По умолчанию = REGISTRY_KEEP
+    ## \param[in] name Название модели. Если указано, то удаляются только версии этой модели. По умолчанию = None
+    ## \details Текущая версия не удаляется и не входит в keep
+    ## \return Список list() с удаленными версиями
+    def prune (self, keep: int=REGISTRY_KEEP, name: str=None) -> list[str]:
+        current = self.current()
+        versions = [metadata["version"] for metadata in self.versions(name) if metadata["version"] != current]
+        removed = versions[:max(len(versions) - keep, 0)]
+
+        for version in removed:
+            self.remove(version)
+
+        return removed
@@ -0,0 +1,210 @@
+import hashlib
+import os
+import uuid
+import joblib
+import numpy as np
+import pandas as pd
+from preprocess import USED_COLUMNS, NUMERIC_COLUMNS, FeatureEncoder, preprocess
+from profiler import stage
+
+## \brief Имя файла с сохраненным конвейером предсказаний
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+PIPELINE_FILENAME = "pipeline.pkl"
+
+## \brief Названия исходов для предсказаний модели
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+LABELS = {1: "Ушел", 0: "Остался"}
+
+## \brief Название столбца с вероятностью ухода клиента
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+PROBA_COLUMN = "Вероятность ухода"
+
+## \brief Пользовательское исключение
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Исключение создано для создания ошибки, когда уже обученная модель была обучена на признаках в другом порядке, чем признаки FeatureEncoder. Такая модель давала бы неверные предсказания на массивах без имен признаков
+## \code
+# if list(model.feature_names_in_) != state["encoder"].feature_names_:
+#     raise FeatureMismatchError(f"Признаки модели {list(model.feature_names_in_)} не совпадают с признаками предобработки {state['encoder'].feature_names_}")
+## \endcode
+class FeatureMismatchError (Exception): pass
+
+## \brief Функция обучения конвейера предсказаний
+## \authors ivan-dev-lab
+## \version 1.3.0
+## \date 18.10.2026
+## \param[in] train_data DataFrame с тренировочными данными
+## \param[in] model Модель-классификатор с методами fit и predict
+## \param[in] fit_model Аргумент определяет необходимость обучения модели. Если модель уже обучена ( например, загружена из старого файла HistGradientBoostingClassifier.pkl ), то обучается только предобработка. По умолчанию = True
+## \details Конвейер - это словарь, содержащий все, что нужно для предсказаний без повторного чтения тренировочных данных:
+## <ol>
+## <li><b>encoder</b> - обученный на тренировочных данных FeatureEncoder</li>
+## <li><b>scaler</b> - обученный на тренировочных данных StandardScaler. Его статистики также хранятся в encoder и применяются при кодировании</li>
+## <li><b>model</b> - обученная модель</li>
+## <li><b>version</b> - уникальный идентификатор версии конвейера, например для кэша предсказаний</li>
+## </ol>
+## \details Модель обучается на массиве numpy без имен признаков, поэтому предсказания можно получать как из transform(...).to_numpy(), так и из массивов класса Predictor
+## \details Старая модель HistGradientBoostingClassifier.pkl обучалась на DataFrame и хранит имена признаков в feature_names_in_, поэтому каждый вызов predict на массиве numpy выводил UserWarning. При fit_model=False порядок этих признаков один раз сверяется с FeatureEncoder ( иначе вызывается FeatureMismatchError ), а сами имена удаляются из модели
+## \return Словарь dict() с обученным конвейером
+def fit_pipeline (train_data: pd.DataFrame, model, fit_model: bool=True) -> dict:
+    state = {}
+    X, Y = preprocess(train_data, data_type="train", state=state)
+
+    if fit_model:
+        model.fit(X.to_numpy(), Y)
+    elif hasattr(model, "feature_names_in_"):
+        if list(model.feature_names_in_) != state["encoder"].feature_names_:
+            raise FeatureMismatchError(f"Признаки модели {list(model.feature_names_in_)} не совпадают с признаками предобработки {state['encoder'].feature_names_}")
+        del model.feature_names_in_
+
+    return {"encoder": state["encoder"], "scaler": state["scaler"], "model": model, "version": uuid.uuid4().hex}
+
+## \brief Функция сохранения конвейера предсказаний
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] pipeline Конвейер, полученный из функции fit_pipeline
+## \param[in] fpath Путь до файла с конвейером
+## \return None
+def save_pipeline (pipeline: dict, fpath: str) -> None:
+    joblib.dump(pipeline, fpath)
+
+## \brief Функция загрузки конвейера предсказаний
+## \authors ivan-dev-lab
+## \version 1.4.0
+## \date 18.10.2026
+## \param[in] fpath Путь до файла с конвейером или до каталога реестра model_registry.ModelRegistry
+## \details Загрузка записывается в профилировщик как этап load_model
+## \details Если fpath - каталог, то из реестра загружается текущая версия. Массивы модели при этом загружаются через np.memmap и доступны только для чтения
+## \details В конвейерах, сохраненных до появления FeatureEncoder, вместо кодировщика хранится список признаков. Такой список преобразуется в FeatureEncoder с теми же признаками и статистиками StandardScaler
+## \details Если в конвейере нет версии, то версией считается хэш sha256 файла
+## \return Словарь dict() с обученным конвейером
+def load_pipeline (fpath: str) -> dict:
+    if os.path.isdir(fpath):
+        from model_registry import ModelRegistry
+        return ModelRegistry(fpath).load()
+
+    with stage("load_model"):
+        pipeline = joblib.load(fpath)
+
+    if isinstance(pipeline["encoder"], list):
+        pipeline["encoder"] = FeatureEncoder.from_feature_names(pipeline["encoder"])
+        pipeline["encoder"].set_scaling(pipeline["scaler"].mean_, pipeline["scaler"].scale_)
+
+    if "version" not in pipeline:
+        with open(fpath, "rb") as file:
+            pipeline["version"] = hashlib.sha256(file.read()).hexdigest()
+
+    return pipeline
+
+## \brief Функция предобработки данных клиентов сохраненным конвейером
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] pipeline Конвейер, полученный из функции fit_pipeline или load_pipeline
+## \param[in] data_df DataFrame с данными клиентов
+## \return DataFrame с признаками, готовыми для model.predict
+def transform (pipeline: dict, data_df: pd.DataFrame) -> pd.DataFrame:
+    return preprocess(data_df, data_type="test", state=pipeline)
+
+## \brief Класс быстрых предсказаний без pandas
+## \authors ivan-dev-lab
+## \version 1.0.1
+## \date 18.10.2026
+## \details Кодирование категорий и масштабирование из FeatureEncoder заранее сведены к индексам и значениям в строке признаков:
+## <ol>
+## <li>строка-основа - это масштабированная строка из нулей: -mean / scale</li>
+## <li>числовой признак записывается как ( value - mean ) / scale</li>
+## <li>для категории в ячейку ее столбца записывается масштабированная единица ( 1 - mean ) / scale</li>
+## </ol>
+## \details Все вычисления выполняются в float32 теми же операциями, что и в FeatureEncoder, поэтому признаки и предсказания совпадают с predict_frame до последнего бита
+## \details Поэтому предсказание для одной записи - это копирование строки-основы в заранее выделенный буфер, запись восьми значений и вызов model.predict. Буфер общий, поэтому predict_one нельзя вызывать из нескольких потоков одновременно
+## \details Пример использования:
+## \code
+# predictor = Predictor(load_pipeline("model/pipeline.pkl"))
+# predictor.predict_one({"Age": 22, "Gender": "Female", "Usage Frequency": 14, "Support Calls": 4, "Payment Delay": 27, "Subscription Type": "Basic", "Contract Length": "Monthly", "Total Spend": 598})
+## \endcode
+class Predictor:
+    ## \brief Конструктор класса
+    ## \param[in] pipeline Конвейер, полученный из функции fit_pipeline или load_pipeline
+    def __init__ (self, pipeline: dict):
+        encoder = pipeline["encoder"]
+        mean, scale = encoder.mean_, encoder.scale_
+
+        self.model = pipeline["model"]
+        self._base = encoder.scale(np.zeros(len(encoder.feature_names_), dtype=np.float32))
+        self._numeric = [(name, i, mean[i], scale[i]) for i, name in enumerate(NUMERIC_COLUMNS)]
+        self._categories = {}
+
+        i = len(NUMERIC_COLUMNS)
+        for name, categories in encoder.categories_.items():
+            self._categories[name] = {}
+            for value in categories:
+                self._categories[name][value] = (i, (np.float32(1) - mean[i]) / scale[i])
+                i += 1
+
+        self._row = np.empty((1, len(encoder.feature_names_)), dtype=np.float32)
+
+    ## \brief Функция предсказания исхода для одного клиента
+    ## \param[in] record Словарь с данными клиента. Лишние ключи ( например, CustomerID ) игнорируются
+    ## \return Строка с исходом из LABELS или None, если в записи есть пропуски
+    def predict_one (self, record: dict):
+        row = self._row
+        np.copyto(row[0], self._base)
+
+        for name, i, mean, scale in self._numeric:
+            value = record.get(name)
+            if value is None or value != value:
+                return None
+            row[0, i] = (np.float32(value) - mean) / scale
+
+        for name, categories in self._categories.items():
+            value = record.get(name)
+            if value is None or value != value:
+                return None
+            if value in categories:
+                i, one = categories[value]
+                row[0, i] = one
+
+        return LABELS[int(self.model.predict(row)[0])]
+
+    ## \brief Функция предсказания исходов для нескольких клиентов
+    ## \param[in] records Список словарей с данными клиентов или двумерный массив со столбцами в порядке preprocess.USED_COLUMNS
+    ## \details Кодирование выполняется по столбцам: для каждого значения категории одной векторной операцией заполняется весь столбец
+    ## \return Список list() с исходами из LABELS. Для записей с пропусками исход = None. Для пустого records - пустой список
+    def predict_many (self, records) -> list:
+        if len(records) == 0:
+            return []
+
+        if isinstance(records[0], dict):
+            values = {name: np.array([record.get(name) for record in records], dtype=object) for name in USED_COLUMNS}
+        else:
+            records = np.asarray(records, dtype=object)
+            values = {name: records[:, i] for i, name in enumerate(USED_COLUMNS)}
+
+        X = np.tile(self._base, (len(records), 1))
+        missing = np.zeros(len(records), dtype=bool)
+
+        for name, i, mean, scale in self._numeric:
+            column = values[name].astype(np.float32)
+            missing |= np.isnan(column)
+            X[:, i] = (column - mean) / scale
+
+        for name, categories in self._categories.items():
+            column = values[name]
+            missing |= pd.isna(column)
+            for value, (i, one) in categories.items():
+                X[column == value, i] = one
+
+        labels = np.full(len(records), None, dtype=object)
+        if missing.all() == False:
+            labels[~missing] = [LABELS[int(label)] for label in self.model.predict(X[~missing])]
+
+        return labels.tolist()
@@ -0,0 +1,178 @@
+import glob
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from preprocess import NUMERIC_COLUMNS, CATEGORICAL_COLUMNS
+from pipeline import LABELS, PROBA_COLUMN
+from profiler import stage
+from scoring import predict_frame
+
+## \brief Коды исходов в кэше предсказаний
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Исход хранится в кэше кодом int8 из LABELS, а не строкой: 1 байт на клиента вместо ссылки на объект str. Код -1 означает, что исход не получен из-за пропусков в признаках
+LABEL_CODES = {label: code for code, label in LABELS.items()}
+
+## \brief Функция расчета хэшей признаков клиентов
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] clients_data DataFrame с данными клиентов
+## \details Числовые признаки приводятся к float64 перед расчетом, поэтому хэш не меняется, если в новой выгрузке pandas прочитал столбец Age как float вместо int
+## \return Массив numpy uint64 с хэшем признаков каждой строки
+def hash_features (clients_data: pd.DataFrame) -> np.ndarray:
+    features = clients_data[NUMERIC_COLUMNS].astype(np.float64)
+    for name in CATEGORICAL_COLUMNS:
+        features[name] = clients_data[name].astype(object)
+
+    return pd.util.hash_pandas_object(features, index=False).to_numpy()
+
+## \brief Функция перевода исходов в коды кэша
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] labels Series с исходами из LABELS. Пропуски допускаются
+## \return Массив numpy int8 с кодами из LABEL_CODES и -1 для пропусков
+def _encode_labels (labels: pd.Series) -> np.ndarray:
+    return labels.map(LABEL_CODES).fillna(-1).to_numpy(dtype=np.int8)
+
+## \brief Класс кэша предсказаний
+## \authors ivan-dev-lab
+## \version 1.3.0
+## \date 18.10.2026
+## \details Поиск в кэше и его сохранение записываются в профилировщик как этапы cache_lookup и cache_save
+## \details Кэш хранит для каждого CustomerID хэш признаков, исход и вероятность ухода, полученный моделью с версией version. Кэш каждой версии модели - отдельный файл .PARQUET в каталоге cache_dir, поэтому после переобучения модели кэш начинается заново. Рядом с ним в файле .JSON хранится среднее время предсказания одной строки для оценки сэкономленного времени
+## \details Строка берется из кэша, если для ее CustomerID в кэше есть запись с тем же хэшем признаков. Остальные строки проходят предобработку и модель, а их исходы добавляются в кэш
+## \details Весь кэш версии загружается в память, а новые записи накапливаются в памяти до вызова save, поэтому расход памяти пропорционален количеству клиентов в кэше ( около 25 байт на клиента без учета CustomerID ), в том числе при обработке файла по частям. Исход хранится кодом int8 из LABEL_CODES, вероятность - float64
+## \details Пример использования:
+## \code
+# cache = PredictionCache("model/prediction_cache", pipeline["version"])
+# result = cache.predict(pipeline, clients_data)
+# cache.save()
+# cache.report()
+## \endcode
+class PredictionCache:
+    ## \brief Конструктор класса
+    ## \param[in] cache_dir Каталог с файлами кэша
+    ## \param[in] version Идентификатор версии модели из pipeline["version"]
+    def __init__ (self, cache_dir: str, version: str):
+        self.cache_dir = cache_dir
+        self.fpath = f"{cache_dir}/{version}.parquet"
+        self.hits = 0
+        self.total = 0
+        self.predict_time = 0.0
+        self.row_time = None
+        self._new = []
+
+        if os.path.exists(f"{cache_dir}/{version}.json"):
+            with open(f"{cache_dir}/{version}.json", encoding="utf-8") as file:
+                self.row_time = json.load(file)["row_time"]
+
+        if os.path.exists(self.fpath):
+            entries = pd.read_parquet(self.fpath)
+            if "churn" not in entries and "Исход" in entries:
+                entries["churn"] = _encode_labels(entries["Исход"])
+        if os.path.exists(self.fpath) == False or PROBA_COLUMN not in entries:
+            entries = pd.DataFrame({"CustomerID": [], "hash": np.array([], dtype=np.uint64), "churn": np.array([], dtype=np.int8), PROBA_COLUMN: np.array([], dtype=np.float64)})
+
+        self._set_entries(entries)
+
+    ## \brief Функция замены записей кэша в памяти
+    ## \param[in] entries DataFrame со столбцами CustomerID, hash, churn и PROBA_COLUMN
+    ## \return None
+    def _set_entries (self, entries: pd.DataFrame) -> None:
+        self._ids = pd.Index(entries["CustomerID"])
+        self._hashes = entries["hash"].to_numpy(dtype=np.uint64)
+        self._codes = entries["churn"].to_numpy(dtype=np.int8)
+        self._probabilities = entries[PROBA_COLUMN].to_numpy(dtype=np.float64)
+
+    ## \brief Функция предсказания исходов с использованием кэша
+    ## \param[in] pipeline Конвейер, полученный из функции pipeline.load_pipeline
+    ## \param[in] clients_data DataFrame с данными клиентов
+    ## \param[in] proba Аргумент определяет добавление столбца PROBA_COLUMN в результат. Вероятность сохраняется в кэш всегда, поэтому кэш подходит для запусков с proba и без него. По умолчанию = False
+    ## \details Поиск выполняется векторно: позиции CustomerID в кэше находятся через get_indexer, а затем хэши сравниваются одной операцией numpy
+    ## \code
+    # positions = self._ids.get_indexer(clients_data["CustomerID"])
+    # hit = positions >= 0
+    # hit[hit] = self._hashes[positions[hit]] == hashes[hit]
+    ## \endcode
+    ## \return DataFrame со столбцами, как в scoring.predict_frame
+    def predict (self, pipeline: dict, clients_data: pd.DataFrame, proba: bool=False) -> pd.DataFrame:
+        with stage("cache_lookup", len(clients_data)):
+            hashes = hash_features(clients_data)
+            positions = self._ids.get_indexer(clients_data["CustomerID"])
+            hit = positions >= 0
+            hit[hit] = self._hashes[positions[hit]] == hashes[hit]
+
+            codes = np.full(len(clients_data), -1, dtype=np.int8)
+            codes[hit] = self._codes[positions[hit]]
+            probabilities = np.empty(len(clients_data), dtype=np.float64)
+            probabilities[hit] = self._probabilities[positions[hit]]
+
+        if hit.all() == False:
+            start = time.perf_counter()
+            missed = predict_frame(pipeline, clients_data[~hit], proba=True)
+            self.predict_time += time.perf_counter() - start
+
+            codes[~hit] = _encode_labels(missed["Исход"])
+            probabilities[~hit] = missed[PROBA_COLUMN].to_numpy(dtype=np.float64)
+            self._new.append(pd.DataFrame({"CustomerID": missed["CustomerID"].to_numpy(), "hash": hashes[~hit], "churn": codes[~hit], PROBA_COLUMN: probabilities[~hit]}))
+
+        self.hits += int(hit.sum())
+        self.total += len(clients_data)
+
+        result = clients_data[["CustomerID"]].copy()
+        result["Исход"] = pd.Series(data=codes, index=result.index).map(LABELS)
+        if proba:
+            result[PROBA_COLUMN] = probabilities
+
+        return result
+
+    ## \brief Функция сохранения кэша
+    ## \details Новые записи заменяют старые с теми же CustomerID. Файлы старого формата со строковым столбцом Исход читаются, а при следующей записи сохраняются с кодами churn. Файл записывается во временный файл и затем атомарно заменяет старый, а файлы кэша других версий модели удаляются
+    ## \return None
+    def save (self) -> None:
+        if len(self._new) == 0:
+            return
+
+        with stage("cache_save"):
+            new = pd.concat(self._new).drop_duplicates(subset="CustomerID", keep="last")
+            old = pd.DataFrame({"CustomerID": self._ids, "hash": self._hashes, "churn": self._codes, PROBA_COLUMN: self._probabilities})
+            entries = pd.concat([old[~old["CustomerID"].isin(new["CustomerID"])], new], ignore_index=True)
+
+            if os.path.exists(self.cache_dir) == False:
+                os.makedirs(self.cache_dir)
+
+            entries.to_parquet(f"{self.fpath}.tmp", index=False)
+            os.replace(f"{self.fpath}.tmp", self.fpath)
+
+            with open(self.fpath.replace(".parquet", ".json"), "w", encoding="utf-8") as file:
+                json.dump({"row_time": self._row_time()}, file)
+
+            for fpath in glob.glob(f"{self.cache_dir}/*.parquet") + glob.glob(f"{self.cache_dir}/*.json"):
+                if os.path.splitext(os.path.abspath(fpath))[0] != os.path.splitext(os.path.abspath(self.fpath))[0]:
+                    os.remove(fpath)
+
+        self._set_entries(entries)
+        self._new = []
+
+    ## \brief Функция расчета среднего времени предсказания одной строки
+    ## \details Если в текущем запуске все строки найдены в кэше, то используется время из прошлых запусков
+    ## \return Время в секундах или None, если оно еще ни разу не измерялось
+    def _row_time (self):
+        misses = self.total - self.hits
+
+        return self.predict_time / misses if misses > 0 else self.row_time
+
+    ## \brief Функция вывода статистики кэша
+    ## \details Сэкономленное время оценивается как количество попаданий, умноженное на среднее время предсказания одной строки, не найденной в кэше
+    ## \return None
+    def report (self) -> None:
+        hit_rate = self.hits / self.total if self.total > 0 else 0.0
+        row_time = self._row_time()
+        saved = f"~{self.hits * row_time:.2f} сек" if row_time != None else "н/д"
+
+        print(f"Кэш предсказаний: найдено {self.hits} из {self.total} строк ( {hit_rate:.1%} ), сэкономлено {saved}")
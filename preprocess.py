@@ -1,41 +1,172 @@
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
+
+## \brief Столбцы исходных данных, которые используются как признаки
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Столбцы CustomerID, Tenure и Last Interaction в признаки не входят, поэтому их можно не загружать
+USED_COLUMNS = ["Age", "Gender", "Usage Frequency", "Support Calls", "Payment Delay", "Subscription Type", "Contract Length", "Total Spend"]
+
+## \brief Числовые признаки
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+NUMERIC_COLUMNS = ["Age", "Usage Frequency", "Support Calls", "Payment Delay", "Total Spend"]
+
+## \brief Категориальные признаки и префиксы, которые pd.get_dummies добавляет к их значениям
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+CATEGORICAL_COLUMNS = {"Gender": "gender", "Subscription Type": "sub_type", "Contract Length": "contract_len"}
+
+## \brief Пользовательское исключение
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Исключение создано для создания ошибки при предобработке данных клиентов без сохраненного состояния. Раньше в этом случае StandardScaler обучался заново на каждом файле, из-за чего признаки строки зависели от остальных строк файла. Ниже пример кода с использованием исключения
+## \code
+# if state is None:
+#     raise MissingStateError("Для data_type=\"test\" необходимо состояние state, полученное при data_type=\"train\"")
+## \endcode
+class MissingStateError (Exception): pass
+
+## \brief Класс кодирования признаков с фиксированной схемой
+## \authors ivan-dev-lab
+## \version 1.2.0
+## \date 18.10.2026
+## \details Раньше категориальные признаки кодировались через pd.get_dummies на каждом наборе данных, поэтому набор столбцов зависел от того, какие значения встретились в наборе. Например, часть файла без Subscription Type == "Premium" давала другие столбцы
+## \details Класс запоминает значения категорий на тренировочных данных и всегда возвращает одну и ту же матрицу признаков float32 со столбцами в порядке feature_names_ - для файла целиком, для его части и для одной строки. Неизвестные значения категорий кодируются нулями, как и при reindex после pd.get_dummies
+## \details Порядок столбцов совпадает с порядком после pd.get_dummies: сначала NUMERIC_COLUMNS, затем значения категорий по алфавиту с префиксами из CATEGORICAL_COLUMNS
+## \details После set_scaling кодировщик также масштабирует признаки статистиками StandardScaler из тренировочных данных прямо в матрице float32. Масштабирование каждой строки не зависит от остальных строк, поэтому предсказания для файла целиком, по частям и по одной строке совпадают
+## \code
+# encoder = FeatureEncoder().fit(train_data)
+# X, valid = encoder.transform(clients_data)
+## \endcode
+class FeatureEncoder:
+    ## \brief Конструктор класса
+    def __init__ (self):
+        self.categories_ = {}
+        self.feature_names_ = []
+        self.mean_ = None
+        self.scale_ = None
+
+    ## \brief Функция обучения кодировщика
+    ## \param[in] data_df DataFrame с тренировочными данными
+    ## \return Обученный кодировщик
+    def fit (self, data_df: pd.DataFrame):
+        self.categories_ = {name: sorted(data_df[name].dropna().unique().tolist()) for name in CATEGORICAL_COLUMNS}
+        self.feature_names_ = NUMERIC_COLUMNS + [f"{prefix}_{value}" for name, prefix in CATEGORICAL_COLUMNS.items() for value in self.categories_[name]]
+
+        return self
+
+    ## \brief Функция дообучения кодировщика на части данных
+    ## \param[in] data_df DataFrame с частью тренировочных данных
+    ## \details Значения категорий из части объединяются с уже известными, поэтому после вызова для всех частей файла кодировщик совпадает с fit на файле целиком
+    ## \return Обученный кодировщик
+    def partial_fit (self, data_df: pd.DataFrame):
+        self.categories_ = {name: sorted(set(self.categories_.get(name, [])) | set(data_df[name].dropna().unique().tolist())) for name in CATEGORICAL_COLUMNS}
+        self.feature_names_ = NUMERIC_COLUMNS + [f"{prefix}_{value}" for name, prefix in CATEGORICAL_COLUMNS.items() for value in self.categories_[name]]
+
+        return self
+
+    ## \brief Функция задания статистик масштабирования
+    ## \param[in] mean Средние значения признаков ( StandardScaler.mean_ )
+    ## \param[in] scale Стандартные отклонения признаков ( StandardScaler.scale_ )
+    ## \return Кодировщик с масштабированием
+    def set_scaling (self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = np.asarray(mean, dtype=np.float32)
+        self.scale_ = np.asarray(scale, dtype=np.float32)
+
+        return self
+
+    ## \brief Функция масштабирования матрицы признаков на месте
+    ## \param[in,out] X Матрица признаков float32 из transform
+    ## \return Та же матрица X
+    def scale (self, X: np.ndarray) -> np.ndarray:
+        X -= self.mean_
+        X /= self.scale_
+
+        return X
+
+    ## \brief Функция кодирования признаков
+    ## \param[in] data_df DataFrame с данными. Не изменяется
+    ## \details Кодирование выполняется за один проход по каждому столбцу: числовые столбцы копируются в матрицу, а номера категорий из pd.Categorical сразу используются как индексы единиц
+    ## \code
+    # codes = pd.Categorical(data_df[name], categories=categories).codes[valid]
+    # X[rows, offset + codes[rows]] = 1
+    ## \endcode
+    ## \return Кортеж tuple(), содержащий матрицу признаков numpy float32 ( масштабированную, если задан set_scaling ) и маску строк без пропусков. Строки с пропусками в матрицу не входят
+    def transform (self, data_df: pd.DataFrame) -> tuple:
+        numeric = data_df[NUMERIC_COLUMNS].to_numpy(dtype=np.float32)
+        valid = ~np.isnan(numeric).any(axis=1) & data_df[list(CATEGORICAL_COLUMNS)].notna().all(axis=1).to_numpy()
+
+        X = np.zeros((int(valid.sum()), len(self.feature_names_)), dtype=np.float32)
+        X[:, :len(NUMERIC_COLUMNS)] = numeric[valid]
+
+        offset = len(NUMERIC_COLUMNS)
+        for name, categories in self.categories_.items():
+            codes = pd.Categorical(data_df[name], categories=categories).codes[valid]
+            rows = np.flatnonzero(codes >= 0)
+            X[rows, offset + codes[rows]] = 1
+            offset += len(categories)
+
+        if self.mean_ is not None:
+            self.scale(X)
+
+        return (X, valid)
+
+    ## \brief Функция создания кодировщика по списку признаков
+    ## \param[in] feature_names Список признаков после pd.get_dummies, который хранился в model/pipeline.pkl до появления класса FeatureEncoder
+    ## \return Кодировщик с теми же признаками
+    @classmethod
+    def from_feature_names (cls, feature_names: list[str]):
+        encoder = cls()
+        encoder.feature_names_ = list(feature_names)
+        encoder.categories_ = {name: [column[len(prefix) + 1:] for column in feature_names if column.startswith(f"{prefix}_")] for name, prefix in CATEGORICAL_COLUMNS.items()}
+
+        return encoder
 
 ## \brief Функция предобработки данных
 ## \authors ivan-dev-lab
-## \version 2.0.2
-## \date 25.08.2023
-## \param[out] filepath путь до необработанных данных 
+## \version 3.2.0
+## \date 18.10.2026
+## \param[in] data_df DataFrame с необработанными данными. Не изменяется
 ## \param[in] data_type Определение типа данных для функции. От параметра зависит - будет ли функция возвращать целевую переменную ( data_type="train" ) или только признаки ( data_type="test" )
-## \details Т.к столбцы Gender, Subscription Type и Contract Length содержат категориальные значение, то было принято решение использовать pd.get_dummies для этиъ столбцов
+## \param[in,out] state Словарь с состоянием предобработки. При data_type="train" в него записываются обученный FeatureEncoder ( "encoder" ) и обученный StandardScaler ( "scaler" ). При data_type="test" состояние обязательно: данные кодируются и масштабируются статистиками из тренировочных данных, без повторного обучения. По умолчанию = None
+## \details Т.к столбцы Gender, Subscription Type и Contract Length содержат категориальные значение, то они кодируются классом FeatureEncoder, который обучается один раз на тренировочных данных
+## \details StandardScaler обучается только при data_type="train". Его статистики передаются в FeatureEncoder, поэтому при data_type="test" масштабирование выполняется в той же матрице float32 без отдельного прохода scaler.transform
+## \details sklearn импортируется только при data_type="train", поэтому предобработка клиентов не тратит время на его загрузку
+## \details Строки с пропусками в признаках ( и в Churn для data_type="train" ) отбрасываются, а индекс оставшихся строк сохраняется
 ## \code
-# data_df = pd.get_dummies(data_df, prefix=["gender"], columns=["Gender"], dtype=int)
-# data_df = pd.get_dummies(data_df, prefix=["sub_type"], columns=["Subscription Type"], dtype=int)
-# data_df = pd.get_dummies(data_df, prefix=["contract_len"], columns=["Contract Length"], dtype=int)
+# encoder = FeatureEncoder().fit(data_df)
+# X, valid = encoder.transform(data_df)
+# scaler = StandardScaler().fit(X)
+# encoder.set_scaling(scaler.mean_, scaler.scale_).scale(X)
 ## \endcode
 ## \return Кортеж tuple(), содержащий признаки и целевые переменные
-def preprocess (data_df: pd.DataFrame, data_type: str) -> tuple:
-    data_df.drop(columns=["CustomerID", "Tenure", "Last Interaction"], inplace=True)
-    data_df.dropna(inplace=True)
+def preprocess (data_df: pd.DataFrame, data_type: str, state: dict=None) -> tuple:
+    if data_type == "train":
+        from sklearn.preprocessing import StandardScaler
 
-    data_df = pd.get_dummies(data_df, prefix=["gender"], columns=["Gender"], dtype=int)
-    data_df = pd.get_dummies(data_df, prefix=["sub_type"], columns=["Subscription Type"], dtype=int)
-    data_df = pd.get_dummies(data_df, prefix=["contract_len"], columns=["Contract Length"], dtype=int)
+        data_df = data_df[data_df["Churn"].notna()]
 
-    if data_type == "train":
-        X = data_df.drop(columns=["Churn"])
-        Y = data_df["Churn"]
-        X_columns = X.columns
+        encoder = FeatureEncoder().fit(data_df)
+        X, valid = encoder.transform(data_df)
+        Y = data_df["Churn"][valid]
 
         scaler = StandardScaler().fit(X)
-        X = pd.DataFrame(data=scaler.transform(X), columns=X_columns)
+        encoder.set_scaling(scaler.mean_, scaler.scale_).scale(X)
+        X = pd.DataFrame(data=X, columns=encoder.feature_names_, index=Y.index)
+
+        if state is not None:
+            state["encoder"] = encoder
+            state["scaler"] = scaler
 
         return (X, Y)
-    else:
-        X = data_df.copy()
-        X_columns = X.columns
+    elif state is not None:
+        X, valid = state["encoder"].transform(data_df)
 
-        scaler = StandardScaler().fit(X)
-        X = pd.DataFrame(data=scaler.transform(X), columns=X_columns)
-        
-        return X
\ No newline at end of file
+        return pd.DataFrame(data=X, columns=state["encoder"].feature_names_, index=data_df.index[valid])
+    else:
+        raise MissingStateError("Для data_type=\"test\" необходимо состояние state, полученное при data_type=\"train\"")
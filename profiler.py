@@ -0,0 +1,320 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+## \brief Профилировщик, в который записываются этапы
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Устанавливается при входе в блок with Profiler(...). Если профилировщик не включен, то stage, record и profile_iter ничего не замеряют, поэтому инструментированный код работает с той же скоростью
+_active = None
+
+## \brief Наибольший пиковый расход памяти процесса до сброса пика
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Профилировщик сбрасывает пик процесса в начале каждого этапа ( функция _reset_hwm ), поэтому пик за все время работы хранится здесь и учитывается в peak_rss
+_lifetime_peak = 0
+
+## \brief Функция получения пикового расхода памяти процесса
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \details В Linux и macOS используется модуль resource. В Windows его нет, поэтому используется psutil, если он установлен
+## \details Значение учитывает пики, сброшенные профилировщиком, поэтому это пик за все время работы процесса
+## \return Пиковый расход памяти процесса ( peak RSS ) в байтах или None, если его нельзя получить
+def peak_rss ():
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset
+        except (ImportError, AttributeError):
+            return None
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max(usage if sys.platform == "darwin" else usage * 1024, _lifetime_peak)
+
+## \brief Функция получения пикового расхода памяти процесса с момента последнего сброса
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Читается строка VmHWM из /proc/self/status, поэтому функция работает только в Linux
+## \return Пиковый расход памяти ( VmHWM ) в байтах или None, если его нельзя получить
+def _read_hwm ():
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+
+    return None
+
+## \brief Функция сброса пикового расхода памяти процесса
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Запись "5" в /proc/self/clear_refs ( Linux 4.0 и новее ) сбрасывает VmHWM до текущего RSS. Перед сбросом пик сохраняется в _lifetime_peak, чтобы peak_rss не уменьшился
+## \return True, если пик сброшен, иначе False
+def _reset_hwm () -> bool:
+    global _lifetime_peak
+
+    hwm = _read_hwm()
+    if hwm == None:
+        return False
+
+    _lifetime_peak = max(_lifetime_peak, hwm)
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        return False
+
+    return True
+
+## \brief Функция получения текущего расхода памяти процесса
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details В Linux читается файл /proc/self/statm, в остальных системах используется psutil, если он установлен. В отличие от peak_rss значение может уменьшаться
+## \return Текущий расход памяти процесса ( RSS ) в байтах или None, если его нельзя получить
+def current_rss ():
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+## \brief Класс замера этапов обработки
+## \authors ivan-dev-lab
+## \version 1.2.0
+## \date 18.10.2026
+## \details Для каждого этапа накапливаются количество вызовов, время, количество строк, расход памяти процесса ( RSS ) в конце последнего вызова и наибольший пик RSS внутри одного вызова. Раньше сохранялся пиковый расход памяти за все время работы процесса, поэтому после обучения у всех этапов был пик обучения
+## \details Пик этапа измеряется так: в начале вызова пик процесса сбрасывается через _reset_hwm, а в конце читается VmHWM, поэтому в пик попадают и временные массивы, освобожденные внутри этапа. Перед сбросом пик записывается во все открытые этапы, а пик вложенного этапа передается внешнему, поэтому вложенность этапов не искажает пик. Если сбросить пик нельзя ( не Linux ), то пик этапа известен, только когда этап превысил пик процесса за все время работы, иначе он не выводится. Каждый вызов этапа также сохраняется как событие формата Chrome Trace, поэтому файл из save можно открыть в chrome://tracing или ui.perfetto.dev
+## \details Если указан cprofile_path, то весь блок with дополнительно профилируется cProfile, а статистика сохраняется в файл для pstats или snakeviz
+## \details Этапы в процессах пула ( scoring.score_parallel и rate_models с n_jobs > 1 ) не записываются, в профилировщик попадает только общее время пула
+## \details Пример использования:
+## \code
+# with Profiler() as profiler:
+#     with stage("read") as info:
+#         clients_data = read_clients("data/test.csv")
+#         info["rows"] = len(clients_data)
+# profiler.summary()
+# profiler.save("profile.json")
+## \endcode
+class Profiler:
+    ## \brief Конструктор класса
+    ## \param[in] enabled Аргумент определяет включение профилировщика. По умолчанию = True
+    ## \param[in] cprofile_path Путь до файла со статистикой cProfile. По умолчанию = None ( cProfile не используется )
+    def __init__ (self, enabled: bool=True, cprofile_path: str=None):
+        self.enabled = enabled
+        self.cprofile_path = cprofile_path
+        self.stages = {}
+        self.events = []
+        self.elapsed = 0.0
+        self._start = time.perf_counter()
+        self._previous = None
+        self._cprofile = None
+        self._open = []
+
+    def __enter__ (self):
+        global _active
+
+        if self.enabled:
+            self._previous, _active = _active, self
+            self._start = time.perf_counter()
+
+            if self.cprofile_path != None:
+                import cProfile
+                self._cprofile = cProfile.Profile()
+                self._cprofile.enable()
+
+        return self
+
+    def __exit__ (self, *exc_info):
+        global _active
+
+        if self.enabled:
+            if self._cprofile != None:
+                self._cprofile.disable()
+                self._cprofile.dump_stats(self.cprofile_path)
+
+            self.elapsed = time.perf_counter() - self._start
+            _active = self._previous
+
+    ## \brief Функция начала замера пика памяти для вызова этапа
+    ## \return Словарь dict() с состоянием замера для функции _end
+    def _begin (self) -> dict:
+        hwm = _read_hwm()
+        for token in self._open:
+            token["peak"] = max(token["peak"] or 0, hwm or 0) or None
+
+        token = {"peak": None, "reset": _reset_hwm(), "start_peak": None}
+        if token["reset"] == False:
+            token["start_peak"] = peak_rss()
+        self._open.append(token)
+
+        return token
+
+    ## \brief Функция окончания замера пика памяти для вызова этапа
+    ## \param[in] token Словарь из функции _begin
+    ## \return Пик RSS внутри вызова в байтах или None, если его нельзя определить
+    def _end (self, token: dict):
+        global _lifetime_peak
+
+        self._open.remove(token)
+
+        if token["reset"]:
+            hwm = _read_hwm()
+            _lifetime_peak = max(_lifetime_peak, hwm or 0)
+            peak = max(token["peak"] or 0, hwm or 0) or None
+        else:
+            end_peak = peak_rss()
+            peak = end_peak if end_peak != None and token["start_peak"] != None and end_peak > token["start_peak"] else None
+
+        for parent in self._open:
+            if peak != None:
+                parent["peak"] = max(parent["peak"] or 0, peak)
+
+        return peak
+
+    ## \brief Функция добавления одного вызова этапа
+    ## \param[in] name Название этапа
+    ## \param[in] start Время начала по time.perf_counter
+    ## \param[in] seconds Длительность в секундах
+    ## \param[in] rows Количество обработанных строк. По умолчанию = None
+    ## \param[in] peak Пик RSS внутри вызова из функции _end. По умолчанию = None ( пик неизвестен )
+    ## \return None
+    def add (self, name: str, start: float, seconds: float, rows: int=None, peak: int=None) -> None:
+        stats = self.stages.setdefault(name, {"calls": 0, "time": 0.0, "rows": 0, "rss": None, "peak_rss": None})
+        rss = current_rss()
+        stats["calls"] += 1
+        stats["time"] += seconds
+        stats["rows"] += rows or 0
+        stats["rss"] = rss
+        if peak != None:
+            stats["peak_rss"] = max(stats["peak_rss"] or 0, peak)
+
+        self.events.append({
+            "name": name,
+            "ph": "X",
+            "ts": (start - self._start) * 1e6,
+            "dur": seconds * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {"rows": rows, "rss": rss, "peak_rss": peak}
+        })
+
+    ## \brief Функция вывода таблицы этапов
+    ## \details Этапы выводятся в порядке первого вызова. Этапы могут быть вложены друг в друга ( например, read внутри score_parallel ), поэтому сумма долей может быть больше 100%
+    ## \details Столбец "RSS, МБ" - расход памяти в конце последнего вызова этапа, "пик, МБ" - наибольший пик RSS внутри одного вызова, включая память, освобожденную до конца этапа
+    ## \return None
+    def summary (self) -> None:
+        elapsed = self.elapsed or time.perf_counter() - self._start
+
+        print(f"{'Этап':<20}{'вызовов':>9}{'время, с':>11}{'доля':>8}{'строк':>12}{'строк/сек':>13}{'RSS, МБ':>9}{'пик, МБ':>9}")
+        for name, stats in self.stages.items():
+            speed = f"{stats['rows'] / stats['time']:.0f}" if stats["rows"] > 0 and stats["time"] > 0 else "-"
+            memory = f"{stats['rss'] / 2**20:.0f}" if stats["rss"] != None else "-"
+            peak = f"{stats['peak_rss'] / 2**20:.0f}" if stats["peak_rss"] != None else "-"
+            print(f"{name:<20}{stats['calls']:>9}{stats['time']:>11.3f}{stats['time'] / max(elapsed, 1e-9):>8.1%}{stats['rows']:>12}{speed:>13}{memory:>9}{peak:>9}")
+        print(f"{'всего':<20}{'':>9}{elapsed:>11.3f}")
+
+        if self.cprofile_path != None:
+            import pstats
+            print(f"\nСтатистика cProfile сохранена в {self.cprofile_path}. Самые долгие функции:")
+            pstats.Stats(self.cprofile_path).sort_stats("cumulative").print_stats(10)
+
+    ## \brief Функция сохранения замеров в файл .JSON
+    ## \param[in] fpath Путь до файла
+    ## \details Файл содержит события traceEvents формата Chrome Trace и сводку stages по этапам
+    ## \return None
+    def save (self, fpath: str) -> None:
+        with open(fpath, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": self.events, "stages": self.stages, "elapsed": self.elapsed, "displayTimeUnit": "ms"}, file, ensure_ascii=False, indent=1)
+
+## \brief Функция замера этапа
+## \authors ivan-dev-lab
+## \version 1.2.0
+## \date 18.10.2026
+## \param[in] name Название этапа
+## \param[in] rows Количество строк, если оно известно до начала этапа. По умолчанию = None
+## \details Возвращает словарь, в который внутри блока with можно записать количество строк, если оно становится известно только после этапа
+## \code
+# with stage("predict", len(X)):
+#     model.predict(X)
+## \endcode
+## \return Контекстный менеджер
+@contextmanager
+def stage (name: str, rows: int=None):
+    info = {"rows": rows}
+
+    if _active == None:
+        yield info
+        return
+
+    profiler = _active
+    token = profiler._begin()
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        seconds = time.perf_counter() - start
+        profiler.add(name, start, seconds, info["rows"], profiler._end(token))
+
+## \brief Функция записи этапа, время которого измерено заранее
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] name Название этапа
+## \param[in] seconds Длительность в секундах
+## \param[in] rows Количество обработанных строк. По умолчанию = None
+## \details Используется для этапов, которые измеряют свое время сами, например обучение моделей в rate_models. Началом этапа считается момент вызова минус seconds. Пик памяти такого этапа не измеряется
+## \return None
+def record (name: str, seconds: float, rows: int=None) -> None:
+    if _active != None:
+        _active.add(name, time.perf_counter() - seconds, seconds, rows)
+
+## \brief Функция замера получения элементов из итератора
+## \authors ivan-dev-lab
+## \version 1.2.0
+## \date 18.10.2026
+## \param[in] name Название этапа
+## \param[in] iterable Итератор, например генератор частей файла
+## \details Каждое получение элемента записывается как отдельный вызов этапа, а количество строк равно len() элемента
+## \return Генератор элементов iterable
+def profile_iter (name: str, iterable):
+    iterator = iter(iterable)
+
+    while True:
+        profiler = _active
+        token = profiler._begin() if profiler != None else None
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            if token != None:
+                profiler._end(token)
+            return
+        except BaseException:
+            if token != None:
+                profiler._end(token)
+            raise
+
+        if profiler != None:
+            seconds = time.perf_counter() - start
+            profiler.add(name, start, seconds, len(item), profiler._end(token))
+
+        yield item
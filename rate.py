@@ -1,44 +1,201 @@
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
-from sklearn.ensemble import HistGradientBoostingClassifier, ExtraTreesClassifier, BaggingClassifier, AdaBoostClassifier, RandomForestClassifier, GradientBoostingClassifier
-from sklearn.tree import DecisionTreeClassifier
-import joblib
+import numpy as np
 import os
+import time
+import hashlib
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
 from preprocess import preprocess
-from create_model import create_model
+from model_registry import ModelRegistry
+from profiler import record, stage
 
-## \brief DataFrame с тренировочными данными
+## \brief Путь до файла с архитектурой нейросети
 ## \authors ivan-dev-lab
 ## \version 1.0.0
-## \date 25.08.2023
-data = pd.read_csv("data/train.csv")
+## \date 18.10.2026
+## \details Хэш файла входит в ключ кэша нейросети, поэтому для проверки кэша не нужно импортировать TensorFlow
+CREATE_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "create_model.py")
 
-## \brief Признаки и целевые переменные
+## \brief Функция загрузки признаков и целевых переменных
+## \authors ivan-dev-lab
+## \version 2.1.0
+## \date 18.10.2026
+## \param[in] fpath Путь до тренировочных данных в формате .CSV. По умолчанию = "data/train.csv"
+## \param[in] max_rows Размер стратифицированной по Churn выборки. Если указан, то файл читается частями функцией training.build_train_matrix и в память попадает только выборка. По умолчанию = None ( файл читается целиком )
+## \details Раньше данные читались и обрабатывались при импорте модуля. Теперь импорт rate не читает файлов, а данные загружаются явно:
+## \code
+# X, Y = load_train_data()
+# models_rating = rate_models(X, Y)
+## \endcode
+## \return Кортеж tuple(), содержащий признаки и целевые переменные из preprocess
+def load_train_data (fpath: str="data/train.csv", max_rows: int=None) -> tuple:
+    if max_rows == None:
+        return preprocess(data_df=pd.read_csv(fpath), data_type="train")
+
+    from training import build_train_matrix
+
+    state = {}
+    X, Y = build_train_matrix(fpath, "sample", max_rows=max_rows, state=state)
+
+    return (pd.DataFrame(data=X, columns=state["encoder"].feature_names_), pd.Series(data=Y, name="Churn"))
+
+## \brief Каталог реестра моделей для рейтинга
+## \authors ivan-dev-lab
+## \version 2.0.0
+## \date 18.10.2026
+## \details Раньше модели сохранялись в models/ отдельными файлами .pkl, а результаты обучения еще раз хранились в кэше models_cache. Теперь каждая модель хранится один раз в сжатом виде в реестре model_registry.ModelRegistry, а ее метрики записаны в метаданные версии и служат кэшем результатов обучения
+MODELS_DIR = "models"
+
+## \brief Уровень сжатия joblib для моделей рейтинга
 ## \authors ivan-dev-lab
 ## \version 1.0.0
-## \date 25.08.2023
-X,Y = preprocess(data_df=data, data_type="train")
+## \date 18.10.2026
+## \details Модели рейтинга загружаются редко, поэтому они хранятся сжатыми, а не в виде, пригодном для np.memmap
+MODELS_COMPRESS = 3
 
-## \brief Функция-оценщик моделей
+## \brief Версия формата записей в кэше
 ## \authors ivan-dev-lab
-## \version 1.1.2
-## \date 24.08.2023
+## \version 1.2.0
+## \date 18.10.2026
+## \details Входит в ключ кэша, поэтому при добавлении новых измерений старые записи не используются. В версии 4 задержка и скорость предсказания измеряются после обучения всех моделей, а не в процессах пула, поэтому записи версии 3 с замерами под нагрузкой не используются
+CACHE_VERSION = 4
+
+## \brief Количество замеров предсказания одной строки при расчете задержки
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+LATENCY_SAMPLES = 200
+
+## \brief Функция расчета хэша тренировочных данных
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
 ## \param[in] X Признаки входных данных 
 ## \param[in] Y Целевые переменные входных данных 
+## \return Строка с хэшем sha256
+def hash_data (X: pd.DataFrame, Y: pd.DataFrame) -> str:
+    data_hash = hashlib.sha256()
+    data_hash.update(",".join(map(str, X.columns)).encode())
+    data_hash.update(pd.util.hash_pandas_object(X, index=True).values.tobytes())
+    data_hash.update(pd.util.hash_pandas_object(Y, index=True).values.tobytes())
+
+    return data_hash.hexdigest()
+
+## \brief Функция расчета ключа кэша для модели
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] data_hash Хэш данных из функции hash_data
+## \param[in] name Название класса модели
+## \param[in] params Параметры модели
+## \return Строка с ключом кэша
+def cache_key (data_hash: str, name: str, params: dict) -> str:
+    params = ",".join(f"{key}={value!r}" for key, value in sorted(params.items()))
+    return hashlib.sha256(f"{CACHE_VERSION}|{data_hash}|{name}|{params}".encode()).hexdigest()
+
+## \brief Функция оценки обученной модели
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \param[in] model Обученная модель
+## \param[in] x_test, y_test Тестовая выборка
+## \param[in] fit_time Время обучения модели в секундах
+## \param[in] predict_kwargs Дополнительные аргументы для model.predict ( например, verbose=0 для нейросети )
+## \details Кроме метрик качества измеряются:
+## <ol>
+## <li><b>predict_time</b> - время предсказания всей тестовой выборки в секундах</li>
+## <li><b>throughput</b> - скорость предсказания всей тестовой выборки в строках в секунду</li>
+## <li><b>p50_latency</b>, <b>p99_latency</b> - медиана и 99-й процентиль времени предсказания одной строки в секундах по LATENCY_SAMPLES замерам</li>
+## </ol>
+## \details Размер модели не измеряется здесь: модель не сериализуется через pickle, а размер берется из реестра после ее сохранения
+## \return Словарь dict() с моделью, метриками и измерениями
+def _measure (model, x_test: pd.DataFrame, y_test: pd.DataFrame, fit_time: float, **predict_kwargs) -> dict:
+    from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+
+    start = time.perf_counter()
+    y_pred = model.predict(x_test, **predict_kwargs)
+    predict_time = time.perf_counter() - start
+
+    latencies = []
+    for i in range(LATENCY_SAMPLES):
+        row = x_test.iloc[[i % len(x_test)]]
+        start = time.perf_counter()
+        model.predict(row, **predict_kwargs)
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "model": model,
+        "mse": mean_squared_error(y_test, y_pred),
+        "mae": mean_absolute_error(y_test, y_pred),
+        "r2": r2_score(y_test, y_pred),
+        "fit_time": fit_time,
+        "predict_time": predict_time,
+        "p50_latency": float(np.percentile(latencies, 50)),
+        "p99_latency": float(np.percentile(latencies, 99)),
+        "throughput": len(x_test) / max(predict_time, 1e-9)
+    }
+
+## \brief Функция обучения одной модели
+## \authors ivan-dev-lab
+## \version 1.2.0
+## \date 18.10.2026
+## \param[in] Model Класс модели sklearn
+## \param[in] x_train, y_train Тренировочная выборка
+## \details Функция выполняется в процессе пула, поэтому объявлена на уровне модуля. Модель здесь только обучается: пока в соседних процессах обучаются другие модели, замер задержки зависел бы от n_jobs, поэтому _measure вызывается в rate_models после завершения пула
+## \return Словарь dict() с моделью и временем обучения в секундах
+def _fit_candidate (Model, x_train: pd.DataFrame, y_train: pd.DataFrame) -> dict:
+    start = time.perf_counter()
+    model = Model().fit(x_train, y_train)
+
+    return {"model": model, "fit_time": time.perf_counter() - start}
+
+## \brief Функция обучения нейросети
+## \authors ivan-dev-lab
+## \version 1.3.0
+## \date 18.10.2026
+## \param[in] x_train, y_train Тренировочная выборка
+## \details TensorFlow импортируется только здесь, т.е только если результата нейросети нет в кэше. Как и в _fit_candidate, модель только обучается, а оценивается через _measure после завершения пула
+## \return Словарь dict() с моделью, временем обучения в секундах и аргументами для model.predict
+def _fit_keras (x_train: pd.DataFrame, y_train: pd.DataFrame) -> dict:
+    from create_model import create_model
+
+    start = time.perf_counter()
+    model = create_model(input_shape=x_train.shape[1])
+    model.fit(x_train, y_train, batch_size=64, epochs=30, verbose=0)
+
+    return {"model": model, "fit_time": time.perf_counter() - start, "predict_kwargs": {"verbose": 0}}
+
+## \brief Функция-оценщик моделей
+## \authors ivan-dev-lab
+## \version 1.8.0
+## \date 18.10.2026
+## \param[in] X Признаки входных данных, например из функции load_train_data
+## \param[in] Y Целевые переменные входных данных 
 ## \param[in] verbose Аргумент определяет вывод на экран результаты обучения моделей. По умолчанию = True
-## \details В приведенной ниже конструкции выполняется сохранение моделей. Это нужно для того, чтобы при итоговой работе в файле main.py моделям не нужно было заново обучаться - достаточно просто загрузить их из файла
+## \param[in] n_jobs Количество процессов, в которых одновременно обучаются модели sklearn. Значение -1 означает все ядра процессора. По умолчанию = 1
+## \param[in] registry_dir Каталог реестра моделей. По умолчанию = MODELS_DIR
+## \param[in] use_cache Аргумент определяет использование результатов обучения из реестра. Если False, то все модели обучаются заново. По умолчанию = True
+## \details Каждая модель регистрируется в реестре model_registry.ModelRegistry с версией из названия модели и ключа из хэша данных и ее параметров, а метрики записываются в метаданные версии. При повторном запуске заново обучаются только модели, версий которых нет в реестре. Для найденных версий читаются только metadata.json, сами модели не загружаются
+## \details Зарегистрированные версии не заменяются. Если версия с тем же ключом уже есть, например при use_cache=False, то к версии добавляется случайный суффикс, а из найденных версий с тем же ключом используется последняя
+## \details Ключ нейросети строится по хэшу файла create_model.py, поэтому при найденной версии TensorFlow не импортируется. Нейросеть сохраняется в формате .keras, а не через pickle
+## \details Модели sklearn хранятся сжатыми ( MODELS_COMPRESS ). Версии тех же моделей, обученные на других данных или с другими параметрами, удаляются из реестра, кроме текущей версии
+## \details Этапы split, hash, cache_load, fit_models, measure_models и save_models записываются в профилировщик, а для каждой обученной заново модели также записываются этапы "fit имя" и "predict имя" со временем из результатов обучения:
 ## \code
-# joblib.dump(model, f"models/{name}.pkl")
+# with Profiler() as profiler:
+#     models_rating = rate_models(X, Y)
+# profiler.summary()
 ## \endcode
+## \details Нейросеть обучается в основном процессе одновременно с пулом, т.к TensorFlow сам использует несколько потоков
+## \details Метрики, задержка и скорость предсказания измеряются функцией _measure последовательно в основном процессе после обучения всех моделей ( этап measure_models ). Раньше они измерялись в процессах пула, пока соседние модели еще обучались, и задержка той же модели при n_jobs=4 была в несколько раз больше, чем при n_jobs=1. Время обучения по-прежнему измеряется в пуле
+## \details В приведенной ниже конструкции выполняется сохранение моделей. Это нужно для того, чтобы при итоговой работе моделям не нужно было заново обучаться - достаточно просто загрузить их из реестра
 ## \code
-# joblib.dump(model, f"models/KerasRegression.pkl")
+# metadata = registry.register(result["model"], name, version=versions[name], features=list(X.columns), data_hash=data_hash, metrics=metrics, compress=MODELS_COMPRESS)
 ## \endcode
-## \return Кортеж tuple(), содержащий названия моделей и результаты их обучения ( mse, mae, r2_score )
-def rate_models (X: pd.DataFrame, Y: pd.DataFrame, verbose=True) -> tuple:
-    model = create_model(input_shape=len(X.columns))
+## \return Кортеж tuple(), содержащий названия моделей, результаты их обучения ( mse, mae, r2_score ), время обучения и предсказания в секундах ( fit_times, predict_times ), медиану и 99-й процентиль задержки предсказания одной строки в секундах ( p50_latencies, p99_latencies ), скорость предсказания в строках в секунду ( throughputs ), размер файлов моделей в реестре в байтах ( sizes ) и версии оцененных моделей в реестре ( model_versions )
+def rate_models (X: pd.DataFrame, Y: pd.DataFrame, verbose=True, n_jobs: int=1, registry_dir: str=MODELS_DIR, use_cache: bool=True) -> tuple:
+    from sklearn.model_selection import train_test_split
+    from sklearn.ensemble import HistGradientBoostingClassifier, ExtraTreesClassifier, BaggingClassifier, AdaBoostClassifier, RandomForestClassifier, GradientBoostingClassifier
+    from sklearn.tree import DecisionTreeClassifier
 
     models = {
         'HistGradientBoostingClassifier': HistGradientBoostingClassifier,
@@ -49,93 +206,162 @@ def rate_models (X: pd.DataFrame, Y: pd.DataFrame, verbose=True) -> tuple:
         'GradientBoostingClassifier': GradientBoostingClassifier,
         'DecisionTreeClassifier': DecisionTreeClassifier
     }
-    
-    names, mse_scores, mae_scores, r2_scores = [], [], [], []
 
-    x_train, x_test, y_train, y_test = train_test_split(X, Y, test_size=0.2, random_state=42)
+    with stage("split", len(X)):
+        x_train, x_test, y_train, y_test = train_test_split(X, Y, test_size=0.2, random_state=42)
+
+    with stage("hash", len(X)):
+        data_hash = hash_data(X, Y)
+    keys = {name: cache_key(data_hash, name, Model().get_params()) for name, Model in models.items()}
+    with open(CREATE_MODEL_PATH, "rb") as file:
+        keys["KerasRegression"] = cache_key(data_hash, "KerasRegression", {"source": hashlib.sha256(file.read()).hexdigest(), "input_shape": X.shape[1], "batch_size": 64, "epochs": 30})
+    prefixes = {name: f"{name}-{key[:16]}" for name, key in keys.items()}
+
+    registry = ModelRegistry(registry_dir)
+    results, versions = {}, {}
+    with stage("cache_load"):
+        for name, prefix in prefixes.items():
+            found = [metadata for metadata in registry.versions(name) if metadata["version"] == prefix or metadata["version"].startswith(f"{prefix}-")]
+            if use_cache and len(found) > 0:
+                results[name] = {**found[-1]["metrics"], "size": found[-1]["size"]}
+                versions[name] = found[-1]["version"]
+            else:
+                versions[name] = prefix if len(found) == 0 else f"{prefix}-{uuid.uuid4().hex[:8]}"
+    cached = set(results)
 
-    for name, Model in models.items():
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
 
-        model = Model().fit(x_train, y_train)
-        joblib.dump(model, f"models/{name}.pkl")
+    with stage("fit_models", len(x_train)), ProcessPoolExecutor(max_workers=n_jobs) if n_jobs > 1 else _NoPool() as executor:
+        futures = {name: executor.submit(_fit_candidate, Model, x_train, y_train) for name, Model in models.items() if name not in results}
 
-        y_pred = model.predict(x_test)
+        if "KerasRegression" not in results:
+            results["KerasRegression"] = _fit_keras(x_train, y_train)
 
-        mse = mean_squared_error(y_test, y_pred)
-        mae = mean_absolute_error(y_test, y_pred)
-        r2 = r2_score(y_test, y_pred)
+        for name, future in futures.items():
+            results[name] = future.result()
+
+    with stage("measure_models", len(x_test)):
+        for name in [name for name in list(models) + ["KerasRegression"] if name not in cached]:
+            results[name] = _measure(results[name]["model"], x_test, y_test, results[name]["fit_time"], **results[name].get("predict_kwargs", {}))
+
+    for name in [name for name in list(models) + ["KerasRegression"] if name not in cached]:
+        record(f"fit {name}", results[name]["fit_time"], len(x_train))
+        record(f"predict {name}", results[name]["predict_time"], len(x_test))
+
+    with stage("save_models"):
+        for name in [name for name in list(models) + ["KerasRegression"] if name not in cached]:
+            metrics = {key: value for key, value in results[name].items() if key != "model"}
+            metadata = registry.register(results[name]["model"], name, version=versions[name], features=list(X.columns), data_hash=data_hash, metrics=metrics, compress=MODELS_COMPRESS)
+            results[name] = {**metrics, "size": metadata["size"]}
+
+        current = registry.current()
+        for metadata in registry.versions():
+            if metadata["name"] in versions and metadata["version"] != versions[metadata["name"]] and metadata["version"] != current:
+                registry.remove(metadata["version"])
+
+    names, mse_scores, mae_scores, r2_scores, fit_times, predict_times = [], [], [], [], [], []
+    p50_latencies, p99_latencies, throughputs, sizes, model_versions = [], [], [], [], []
+
+    for name in list(models) + ["KerasRegression"]:
+        result = results[name]
 
         names.append(name)
-        mse_scores.append(mse)
-        mae_scores.append(mae)
-        r2_scores.append(r2)
+        mse_scores.append(result["mse"])
+        mae_scores.append(result["mae"])
+        r2_scores.append(result["r2"])
+        fit_times.append(result["fit_time"])
+        predict_times.append(result["predict_time"])
+        p50_latencies.append(result["p50_latency"])
+        p99_latencies.append(result["p99_latency"])
+        throughputs.append(result["throughput"])
+        sizes.append(result["size"])
+        model_versions.append(versions[name])
 
         if verbose:
-            print(f"\n{name}:\nmean_squared_error: {mse}\nmean_absolute_error: {mae}\nr2_score: {r2}")
-        
-        
+            print(f"\n{name}:\nmean_squared_error: {result['mse']}\nmean_absolute_error: {result['mae']}\nr2_score: {result['r2']}\nfit_time: {result['fit_time']:.3f}s\npredict_time: {result['predict_time']:.3f}s")
+            print(f"latency p50/p99: {result['p50_latency'] * 1000:.2f}/{result['p99_latency'] * 1000:.2f}ms\nthroughput: {result['throughput']:.0f} rows/s\nsize: {result['size'] / 1024:.1f}KB")
 
-    model = create_model(input_shape=X.shape[1])
-    model.fit(x_train, y_train, batch_size=64, epochs=30, verbose=0)
-    joblib.dump(model, f"models/KerasRegression.pkl")
-    
+    return (names, mse_scores, mae_scores, r2_scores, fit_times, predict_times, p50_latencies, p99_latencies, throughputs, sizes, model_versions)
 
-    y_pred = model.predict(x_test)
-    
-    mse = mean_squared_error(y_test, y_pred)
-    mae = mean_absolute_error(y_test, y_pred)
-    r2 = r2_score(y_test, y_pred)
-
-    names.append("KerasRegression")
-    mse_scores.append(mse)
-    mae_scores.append(mae)
-    r2_scores.append(r2)
-    
+## \brief Пул-заглушка для последовательного обучения моделей
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Используется в rate_models при n_jobs=1: функция выполняется сразу в основном процессе, а результат возвращается через concurrent.futures.Future
+class _NoPool:
+    def submit (self, function, *args):
+        future = Future()
+        future.set_result(function(*args))
+        return future
 
-    if verbose:
-        print(f"\KerasRegression:\nmean_squared_error: {mse}\nmean_absolute_error: {mae}\nr2_score: {r2}")
-            
-    return (names, mse_scores, mae_scores, r2_scores)
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, *exc_info):
+        pass
 
 ## \brief Функция построения графиков рейтинга моделей
 ## \authors ivan-dev-lab
-## \version 1.1.1
-## \date 24.08.2023
+## \version 1.3.1
+## \date 18.10.2026
 ## \param[in] models_rating Кортеж с рейтингом моделей из rate_models
 ## \param[in] fpath Путь до каталога с графиками 
+## \details seaborn и matplotlib импортируются только при построении графиков
+## \details Кроме графиков метрик качества строятся графики времени обучения, задержки p99, скорости предсказания и размера моделей. Перед каждым графиком фигура очищается, чтобы графики не накладывались друг на друга
 ## \return None
 def create_models_charts (models_rating: tuple, fpath: str) -> None:
-    names, mse_scores, mae_scores, r2_scores = models_rating
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
+    names, mse_scores, mae_scores, r2_scores, fit_times, predict_times, p50_latencies, p99_latencies, throughputs, sizes = models_rating[:10]
+
+    charts = [
+        (r2_scores, "r2_score", "r2_scores"),
+        (mse_scores, "Mean-Squared-Error", "MSE"),
+        (mae_scores, "Mean-Absolute-Error", "MAE"),
+        (fit_times, "Время обучения, сек", "fit_time"),
+        ([latency * 1000 for latency in p99_latencies], "Задержка предсказания одной строки p99, мс", "p99_latency"),
+        (throughputs, "Скорость предсказания, строк/сек", "throughput"),
+        ([size / 1024 for size in sizes], "Размер модели, КБ", "size")
+    ]
     
     sns.set_style("darkgrid")
     plt.figure(figsize=(20,10))
 
-    sns.barplot(x=r2_scores, y=names)
-    plt.xlabel("r2_score")
-    plt.ylabel("Названия моделей")
-    plt.savefig(f"{fpath}/r2_scores")
-    
-    
-    sns.barplot(x=mse_scores, y=names)
-    plt.xlabel("Mean-Squared-Error")
-    plt.ylabel("Названия моделей")
-    plt.savefig(f"{fpath}/MSE")
-    
+    for scores, xlabel, fname in charts:
+        plt.clf()
+        sns.barplot(x=scores, y=names)
+        plt.xlabel(xlabel)
+        plt.ylabel("Названия моделей")
+        plt.savefig(f"{fpath}/{fname}")
 
-    sns.barplot(x=mae_scores, y=names)
-    plt.xlabel("Mean-Absolute-Error")
-    plt.ylabel("Названия моделей")
-    plt.savefig(f"{fpath}/MAE")
-    
+## \brief Функция расчета взвешенной оценки модели с учетом стоимости предсказаний
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] models_rating Рейтинг моделей, полученный из функции rate_models
+## \param[in] cost_weight Вес задержки в оценке. По умолчанию = 0.5
+## \details Ошибка mse и задержка p99 делятся на свои максимальные значения в рейтинге, поэтому оба слагаемых находятся в диапазоне [0, 1]. Чем меньше оценка, тем лучше модель
+## \code
+# cost = mse / max(mse_scores) + cost_weight * p99_latency / max(p99_latencies)
+## \endcode
+## \return Список list() с оценками в порядке моделей из рейтинга
+def get_cost_scores (models_rating: tuple, cost_weight: float=0.5) -> list[float]:
+    mse_scores, p99_latencies = models_rating[1], models_rating[7]
+    max_mse, max_latency = max(max(mse_scores), 1e-12), max(max(p99_latencies), 1e-12)
+
+    return [mse / max_mse + cost_weight * latency / max_latency for mse, latency in zip(mse_scores, p99_latencies)]
 
 ## \brief Функция расчета лучшей модели по трем метрикам
 ## \authors ivan-dev-lab-home
-## \version 1.1.0
-## \date 13.08.2023
+## \version 1.2.0
+## \date 18.10.2026
 ## \param[in] models_rating Рейтинг моделей, полученный из функции rate_models
 ## \param[in] fpath Путь до файла с лучшими моделями  
 ## \details Программа ищет минимальную метрику из каждого массива ( mse_scores, mae_scores, r2_scores)
 ## \details Далее в массиве names происходит поиск имени модели по индексу минимальной ( в случае r2_scores - максимальной) метрики в массиве ( mse_scores, mae_scores, r2_scores)
+## \details Аналогично ищутся самая быстрая модель по задержке p99 и по скорости предсказания
 ## \code
 # best_models["mse"] = [names[mse_scores.index(min(mse_scores))], min(mse_scores)]
 ## \endcode
@@ -152,18 +378,23 @@ def create_models_charts (models_rating: tuple, fpath: str) -> None:
 # for metric, result in best_models.items():
 #     print(f"Метрика {metric} - лучший результат у {result[0]} = {result[1]}")
 ## \endcode
-## \return Словарь dict() с тремя лучшими моделями по метрикам mse, mae, r2_score
+## \return Словарь dict() с лучшими моделями по метрикам mse, mae, r2_score, p99_latency, throughput
 def get_best_models (models_rating: tuple, fpath: str) -> dict:
     best_models = {
         "mse": list,
         "mae": list,
-        "r2_score": list
+        "r2_score": list,
+        "p99_latency": list,
+        "throughput": list
     }
-    names, mse_scores, mae_scores, r2_scores = models_rating
+    names, mse_scores, mae_scores, r2_scores = models_rating[:4]
+    p99_latencies, throughputs = models_rating[7], models_rating[8]
     
     best_models["mse"] = [names[mse_scores.index(min(mse_scores))], min(mse_scores)]
     best_models["mae"] = [names[mae_scores.index(min(mae_scores))], min(mae_scores)]
     best_models["r2_score"] = [names[r2_scores.index(max(r2_scores))], max(r2_scores)]
+    best_models["p99_latency"] = [names[p99_latencies.index(min(p99_latencies))], min(p99_latencies)]
+    best_models["throughput"] = [names[throughputs.index(max(throughputs))], max(throughputs)]
     
     return best_models
 
@@ -184,67 +415,47 @@ class IncorrectParameterError (Exception): pass
 
 ## \brief Функция возврата n-лучших моделей по метрике
 ## \authors ivan-dev-lab-home
-## \version 1.0.1
-## \date 16.08.2023
+## \version 1.3.0
+## \date 18.10.2026
 ## \param[in] models_rating Рейтинг моделей, полученный из функции rate_models
-## \param[in] top_by Метрика, на основании которой будет составлять топ n лучших моделей 
+## \param[in] top_by Метрика, на основании которой будет составлять топ n лучших моделей: "mse", "mae", "r2_score" или "cost" ( взвешенная оценка из функции get_cost_scores )
 ## \param[in] num_top Количество моделей, которые зайдут в топ
+## \param[in] max_latency Ограничение задержки предсказания одной строки p99 в секундах. Модели с большей задержкой в топ не попадают. По умолчанию = None ( без ограничения )
+## \param[in] cost_weight Вес задержки для top_by="cost". По умолчанию = 0.5
+## \param[in] registry_dir Каталог реестра моделей из rate_models. По умолчанию = MODELS_DIR
 ## \brief Объяснение кода
-## \details В приведенных ниже конструкциях выполняется добавления названия модели с наилучшим результатом. В конструкции выполняется поиск названия модели в массиве names по индексу наилучшего результата в массиве с соотвествующими метрииками
-## \code
-# models_top.append(names[mse_scores.index(min(mse_scores))])
-## \endcode
-## \code
-# models_top.append(names[mae_scores.index(min(mae_scores))])
-## \endcode
+## \details Сначала отбираются индексы моделей, которые укладываются в max_latency. Затем индексы сортируются по выбранной метрике ( для r2_score - по убыванию ) и берутся первые num_top
 ## \code
-# models_top.append(names[r2_scores.index(max(r2_scores))])
+# ranked = sorted(candidates, key=lambda i: scores[i], reverse=top_by == "r2_score")
 ## \endcode
-## \details В приведенных ниже конструкциях выполняется удаление наилучшего результата из массива с метриками ( в конце - из массива с названиями моделей ) для того, чтобы название модели в итоговом массиве models_top не повторялось
+## \details Раньше после отбора из каталога models удалялись файлы всех моделей, кроме лучших. Теперь модели не удаляются, а именно та версия лучшей модели, которая была оценена в rate_models ( model_versions ), атомарно назначается текущей в реестре, поэтому ее можно загрузить через registry.load(). Реестр сам удаляет устаревшие версии в rate_models
 ## \code
-# mse_scores.pop(mse_scores.index(min(mse_scores)))
-## \endcode
-## \code
-# mae_scores.pop(mae_scores.index(min(mae_scores)))
-## \endcode
-## \code
-# r2_scores.pop(r2_scores.index(max(r2_scores)))
-## \endcode
-## \code
-# names.remove(models_top[len(models_top)-1])
-## \endcode
-## \details В приведенной ниже конструкции выполняется удаление файлов с моделями, кроме тех, которые были лучшими ( названия которых есть в массиве models_top )
-## \code
-# for model_file in os.listdir("models"):
-#     if model_file.split(".")[0] not in models_top:
-#         os.remove(f"models/{model_file}")
+# registry.promote(model_versions[ranked[0]])
 ## \endcode
 ## \return Список list() с n-лучшими моделями по определенному признаку
-def get_models_top (models_rating: tuple, top_by: str, num_top: int=3) -> list[str]:
-    models_top = []
-    names, mse_scores, mae_scores, r2_scores = models_rating
+def get_models_top (models_rating: tuple, top_by: str, num_top: int=3, max_latency: float=None, cost_weight: float=0.5, registry_dir: str=MODELS_DIR) -> list[str]:
+    names, mse_scores, mae_scores, r2_scores = models_rating[:4]
+    p99_latencies, model_versions = models_rating[7], models_rating[10]
+
+    candidates = [i for i in range(len(names)) if max_latency == None or p99_latencies[i] <= max_latency]
     
-    if num_top <= len(names):
-        if top_by in ["mse", "mae", "r2_score"]:
-            for _ in range(num_top):
-                if top_by == "mse":
-                    models_top.append(names[mse_scores.index(min(mse_scores))])
-                    mse_scores.pop(mse_scores.index(min(mse_scores)))
-                if top_by == "mae":
-                    models_top.append(names[mae_scores.index(min(mae_scores))])
-                    mae_scores.pop(mae_scores.index(min(mae_scores)))
-                if top_by == "r2_score":
-                    models_top.append(names[r2_scores.index(max(r2_scores))])
-                    r2_scores.pop(r2_scores.index(max(r2_scores)))
-
-                names.remove(models_top[len(models_top)-1])
+    if num_top <= len(candidates):
+        if top_by in ["mse", "mae", "r2_score", "cost"]:
+            scores = {
+                "mse": mse_scores,
+                "mae": mae_scores,
+                "r2_score": r2_scores,
+                "cost": get_cost_scores(models_rating, cost_weight) if top_by == "cost" else None
+            }[top_by]
+
+            ranked = sorted(candidates, key=lambda i: scores[i], reverse=top_by == "r2_score")
+            models_top = [names[i] for i in ranked[:num_top]]
             
-            for model_file in os.listdir("models"):
-                if model_file.split(".")[0] not in models_top:
-                    os.remove(f"models/{model_file}")
+            if len(models_top) > 0:
+                ModelRegistry(registry_dir).promote(model_versions[ranked[0]])
         else:
-            raise IncorrectParameterError(f'Введенный параметр [top_by={top_by}] является некорректным т.к не принадлежит последовательности ["mse", "mae", "r2_score"])')
+            raise IncorrectParameterError(f'Введенный параметр [top_by={top_by}] является некорректным т.к не принадлежит последовательности ["mse", "mae", "r2_score", "cost"])')
     else:
-        raise IncorrectParameterError(f'Введенный параметр [num_top={num_top}] является некорректным т.к является больше, чем количество нейросетей, участвующих в рейтинге')
+        raise IncorrectParameterError(f'Введенный параметр [num_top={num_top}] является некорректным т.к является больше, чем количество нейросетей, участвующих в рейтинге и укладывающихся в max_latency={max_latency}')
 
-    return models_top
\ No newline at end of file
+    return models_top
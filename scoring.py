@@ -0,0 +1,224 @@
+import glob
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from data_io import STREAMING_FORMATS, PredictionWriter, TopKWriter, get_format, is_supported, read_clients, iter_clients
+from pipeline import LABELS, PROBA_COLUMN, transform
+from profiler import stage
+
+## \brief Количество строк в одной части файла при параллельной обработке, если не указан chunksize
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+PARTITION_SIZE = 100_000
+
+## \brief Конвейер, загруженный в процесс-обработчик
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \details Заполняется функцией _init_worker один раз при запуске процесса, чтобы не передавать модель с каждой частью данных
+_worker_pipeline = None
+
+## \brief Флаг расчета вероятностей в процессе-обработчике
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+_worker_proba = False
+
+## \brief Функция предсказания исходов для DataFrame с клиентами
+## \authors ivan-dev-lab
+## \version 1.2.0
+## \date 18.10.2026
+## \param[in] pipeline Конвейер, полученный из функции pipeline.fit_pipeline или pipeline.load_pipeline
+## \param[in] clients_data DataFrame с данными клиентов
+## \param[in] proba Аргумент определяет добавление столбца PROBA_COLUMN с вероятностью ухода клиента. По умолчанию = False
+## \details Строки с пропусками не попадают в модель и получают пустой исход, как и раньше в main.main()
+## \details При proba=True модель вызывается один раз: исход берется как класс с наибольшей вероятностью из predict_proba, так же, как это делает predict у классификаторов sklearn
+## \code
+# probabilities = model.predict_proba(X)
+# churn = model.classes_[probabilities.argmax(axis=1)]
+## \endcode
+## \details Предобработка и предсказание записываются в профилировщик как этапы preprocess и predict
+## \return DataFrame со столбцами CustomerID, Исход и, при proba=True, PROBA_COLUMN
+def predict_frame (pipeline: dict, clients_data: pd.DataFrame, proba: bool=False) -> pd.DataFrame:
+    result = clients_data[["CustomerID"]].copy()
+    model = pipeline["model"]
+
+    with stage("preprocess", len(clients_data)):
+        clients_data_prep = transform(pipeline, clients_data)
+
+    with stage("predict", len(clients_data_prep)):
+        if proba:
+            probabilities = model.predict_proba(clients_data_prep.to_numpy()) if len(clients_data_prep) > 0 else np.empty((0, len(model.classes_)))
+            churn = pd.Series(data=model.classes_[probabilities.argmax(axis=1)], index=clients_data_prep.index)
+            result["Исход"] = churn.map(LABELS)
+            result[PROBA_COLUMN] = pd.Series(data=probabilities[:, list(model.classes_).index(1)], index=clients_data_prep.index)
+        else:
+            churn = pd.Series(data=model.predict(clients_data_prep.to_numpy()), index=clients_data_prep.index)
+            result["Исход"] = churn.map(LABELS)
+
+    return result
+
+## \brief Функция создания объекта записи предсказаний
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] pred_path Путь до файла с предсказаниями
+## \param[in] top_k Количество клиентов с наибольшей вероятностью ухода. Если None, то записываются все предсказания. По умолчанию = None
+## \details При top_k предсказания должны содержать столбец PROBA_COLUMN ( predict_frame с proba=True )
+## \return Объект data_io.TopKWriter или data_io.PredictionWriter
+def open_writer (pred_path: str, top_k: int=None):
+    return TopKWriter(pred_path, top_k, PROBA_COLUMN) if top_k != None else PredictionWriter(pred_path)
+
+## \brief Функция потоковых предсказаний для файлов, не помещающихся в память
+## \authors ivan-dev-lab
+## \version 1.3.0
+## \date 18.10.2026
+## \param[in] pipeline Конвейер, полученный из функции pipeline.fit_pipeline или pipeline.load_pipeline
+## \param[in] clients_path Путь до данных клиентов в формате [.CSV|.PARQUET]
+## \param[in] pred_path Путь до файла с предсказаниями в формате [.CSV|.PARQUET]. При top_k подходит любой поддерживаемый формат
+## \param[in] chunksize Количество строк, читаемых за один раз
+## \param[in] cache Объект prediction_cache.PredictionCache. Если передан, то части обрабатываются через кэш. По умолчанию = None
+## \param[in] proba Аргумент определяет добавление вероятности ухода в предсказания. По умолчанию = False
+## \param[in] top_k Количество клиентов с наибольшей вероятностью ухода, которые будут записаны в файл. Если указан, то вероятности рассчитываются всегда. По умолчанию = None
+## \details Файл с клиентами читается частями по chunksize строк. Каждая часть обрабатывается сохраненной предобработкой, передается в модель и дописывается в конец файла с предсказаниями, поэтому расход памяти зависит только от chunksize, а не от размера файла
+## \code
+# with PredictionWriter(pred_path) as writer:
+#     for chunk in iter_clients(clients_path, chunksize):
+#         writer.write(predict_frame(pipeline, chunk))
+## \endcode
+## \details При top_k вместо PredictionWriter используется TopKWriter, который хранит только top_k клиентов, поэтому расход памяти также не зависит от размера файла
+## \return Количество обработанных строк
+def score_chunks (pipeline: dict, clients_path: str, pred_path: str, chunksize: int, cache=None, proba: bool=False, top_k: int=None) -> int:
+    get_format(pred_path, streaming=top_k == None)
+    proba = proba or top_k != None
+
+    with open_writer(pred_path, top_k) as writer:
+        for chunk in iter_clients(clients_path, chunksize):
+            writer.write(cache.predict(pipeline, chunk, proba=proba) if cache != None else predict_frame(pipeline, chunk, proba=proba))
+
+    return writer.rows
+
+## \brief Функция поиска файлов с клиентами
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] clients Путь до файла, каталога или шаблон glob ( например, data/clients_*.csv )
+## \details Для каталога возвращаются все файлы поддерживаемых форматов из него. Файлы всегда отсортированы по имени, поэтому порядок предсказаний не зависит от файловой системы
+## \return Список list() с путями до файлов
+def list_partitions (clients: str) -> list[str]:
+    if os.path.isdir(clients):
+        fpaths = [fpath for fpath in glob.glob(f"{clients}/*") if is_supported(fpath)]
+    elif os.path.isfile(clients):
+        fpaths = [clients]
+    else:
+        fpaths = glob.glob(clients)
+
+    return sorted(fpath.replace("\\", '/') for fpath in fpaths)
+
+## \brief Функция инициализации процесса-обработчика
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \param[in] pipeline Конвейер, который будет использоваться процессом
+## \param[in] proba Флаг расчета вероятностей ухода. По умолчанию = False
+## \return None
+def _init_worker (pipeline: dict, proba: bool=False) -> None:
+    global _worker_pipeline, _worker_proba
+    _worker_pipeline = pipeline
+    _worker_proba = proba
+
+## \brief Функция обработки одной части данных в процессе-обработчике
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] partition Путь до файла с клиентами или DataFrame с частью файла
+## \details Время чтения файла входит в замер, т.к чтение тоже выполняется процессом-обработчиком
+## \return Кортеж tuple(), содержащий предсказания, pid процесса, количество строк и время обработки в секундах
+def _score_partition (partition) -> tuple:
+    start = time.perf_counter()
+
+    if isinstance(partition, str):
+        partition = read_clients(partition)
+
+    result = predict_frame(_worker_pipeline, partition, proba=_worker_proba)
+
+    return (result, os.getpid(), len(result), time.perf_counter() - start)
+
+## \brief Функция разбиения входных данных на части
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \param[in] fpaths Список файлов, полученный из функции list_partitions
+## \param[in] chunksize Количество строк в одной части
+## \details Если файлов несколько, то частью является файл целиком и читает его процесс-обработчик. Единственный файл [.CSV|.PARQUET] читается по chunksize строк и передается процессам по частям
+## \details Единственный файл [.XLSX|.FEATHER|.ARROW] нельзя читать по частям, поэтому он читается в основном процессе целиком и делится на части по chunksize строк. Иначе весь файл оказался бы одной частью и обрабатывался бы одним процессом
+## \return Генератор частей данных
+def _iter_partitions (fpaths: list[str], chunksize: int):
+    if len(fpaths) == 1 and get_format(fpaths[0]) in STREAMING_FORMATS:
+        yield from iter_clients(fpaths[0], chunksize)
+    elif len(fpaths) == 1:
+        clients_data = read_clients(fpaths[0])
+        for start in range(0, len(clients_data), chunksize):
+            yield clients_data.iloc[start:start + chunksize]
+    else:
+        yield from fpaths
+
+## \brief Функция параллельных предсказаний на нескольких ядрах
+## \authors ivan-dev-lab
+## \version 1.2.1
+## \date 18.10.2026
+## \param[in] pipeline Конвейер, полученный из функции pipeline.fit_pipeline или pipeline.load_pipeline
+## \param[in] clients Путь до файла, каталога или шаблон glob с данными клиентов
+## \param[in] pred_path Путь до файла с предсказаниями в формате [.CSV|.XLSX|.PARQUET|.FEATHER|.ARROW]
+## \param[in] workers Количество процессов-обработчиков
+## \param[in] chunksize Количество строк в одной части единственного файла. По умолчанию = PARTITION_SIZE
+## \param[in] verbose Аргумент определяет вывод на экран скорости обработки каждого процесса. По умолчанию = True
+## \param[in] proba Аргумент определяет добавление вероятности ухода в предсказания. По умолчанию = False
+## \param[in] top_k Количество клиентов с наибольшей вероятностью ухода, которые будут записаны в файл. По умолчанию = None ( записываются все предсказания )
+## \details Предобработка и предсказания выполняются в пуле процессов. Одновременно в обработке находится не больше 2 * workers частей, а результаты записываются строго в порядке частей, поэтому итоговый файл не зависит от количества процессов
+## \return Словарь dict() со статистикой процессов вида {pid: [количество строк, время обработки]}
+def score_parallel (pipeline: dict, clients: str, pred_path: str, workers: int, chunksize: int=None, verbose=True, proba: bool=False, top_k: int=None) -> dict:
+    fpaths = list_partitions(clients)
+    if len(fpaths) == 0:
+        raise FileNotFoundError(f"По пути [{clients}] не найдено файлов с клиентами")
+
+    stats = {}
+
+    with open_writer(pred_path, top_k) as writer, ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pipeline, proba or top_k != None)) as executor:
+        pending = deque()
+
+        for partition in _iter_partitions(fpaths, chunksize or PARTITION_SIZE):
+            pending.append(executor.submit(_score_partition, partition))
+
+            while len(pending) >= 2 * workers:
+                _collect(pending.popleft().result(), writer, stats)
+
+        while pending:
+            _collect(pending.popleft().result(), writer, stats)
+
+    if verbose:
+        for pid, (worker_rows, elapsed) in stats.items():
+            print(f"Процесс {pid}: {worker_rows} строк за {elapsed:.2f} сек ( {worker_rows / max(elapsed, 1e-9):.0f} строк/сек )")
+
+    return stats
+
+## \brief Функция записи результата одной части
+## \authors ivan-dev-lab
+## \version 1.2.0
+## \date 18.10.2026
+## \param[in] output Результат функции _score_partition
+## \param[in] writer Объект PredictionWriter или TopKWriter для файла с предсказаниями
+## \param[out] stats Статистика процессов
+## \return None
+def _collect (output: tuple, writer, stats: dict) -> None:
+    result, pid, worker_rows, elapsed = output
+
+    writer.write(result)
+
+    worker_stats = stats.setdefault(pid, [0, 0.0])
+    worker_stats[0] += worker_rows
+    worker_stats[1] += elapsed
@@ -0,0 +1,217 @@
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Queue, Empty
+
+## \brief Функция проверки записей одного запроса
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] records Список записей из тела запроса
+## \details Каждая запись должна быть JSON-объектом, числовые признаки из preprocess.NUMERIC_COLUMNS должны приводиться к float, а категориальные признаки должны быть строками. Пропуски ( null или отсутствующий ключ ) допускаются, для таких записей Исход = None
+## \details Запрос проверяется до постановки в очередь, поэтому некорректная запись не попадает в общий пакет и не приводит к ошибке у других запросов
+## \return Строка с описанием ошибки или None, если записи корректны
+def validate_records (records: list) -> str:
+    from preprocess import NUMERIC_COLUMNS, CATEGORICAL_COLUMNS
+
+    for number, record in enumerate(records, start=1):
+        if isinstance(record, dict) == False:
+            return f"Строка {number}: ожидается JSON-объект, получен {type(record).__name__}"
+
+        for name in NUMERIC_COLUMNS:
+            if record.get(name) is None:
+                continue
+            try:
+                float(record[name])
+            except (TypeError, ValueError):
+                return f"Строка {number}: значение [{record[name]!r}] признака [{name}] не является числом"
+
+        for name in CATEGORICAL_COLUMNS:
+            if record.get(name) is not None and isinstance(record[name], str) == False:
+                return f"Строка {number}: значение [{record[name]!r}] признака [{name}] не является строкой"
+
+    return None
+
+## \brief Класс объединения одновременных запросов в один вызов модели
+## \authors ivan-dev-lab
+## \version 1.3.0
+## \date 18.10.2026
+## \details Запросы из разных потоков складываются в очередь. Фоновый поток забирает из очереди все запросы, пришедшие за max_wait секунд ( но не больше max_batch записей ), и обрабатывает их одним вызовом Predictor.predict_many
+## \details Пример использования:
+## \code
+# batcher = MicroBatcher(load_pipeline("model/pipeline.pkl"))
+# batcher.predict([{"CustomerID": 1, "Age": 22, "Gender": "Female", ...}])
+## \endcode
+class MicroBatcher:
+    ## \brief Конструктор класса
+    ## \param[in] pipeline Конвейер, полученный из функции pipeline.load_pipeline
+    ## \param[in] max_batch Максимальное количество записей в одном вызове модели. По умолчанию = 1024
+    ## \param[in] max_wait Максимальное время ожидания следующих запросов в секундах. По умолчанию = 0.002
+    def __init__ (self, pipeline: dict, max_batch: int=1024, max_wait: float=0.002):
+        from pipeline import Predictor
+
+        self.predictor = Predictor(pipeline)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    ## \brief Функция предсказания исходов для списка записей
+    ## \param[in] records Список словарей с данными клиентов
+    ## \details Функция блокирует вызывающий поток до тех пор, пока пакет с его записями не будет обработан
+    ## \return Список list() словарей с CustomerID и Исход в порядке записей. Для записей с пропусками Исход = None
+    def predict (self, records: list[dict]) -> list[dict]:
+        future = Future()
+        self._queue.put((records, future))
+        return future.result()
+
+    ## \brief Функция фонового потока, собирающего пакеты
+    ## \return None
+    def _run (self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.perf_counter() + self.max_wait
+
+            while size < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            self._process(batch)
+
+    ## \brief Функция обработки одного пакета
+    ## \param[in] batch Список пар ( записи, Future )
+    ## \details Если общий вызов predict_many завершился ошибкой, то записи каждого запроса обрабатываются отдельно, поэтому ошибку получает только запрос, который ее вызвал
+    ## \return None
+    def _process (self, batch: list[tuple]) -> None:
+        try:
+            labels = self.predictor.predict_many([record for item in batch for record in item[0]])
+        except Exception:
+            for records, future in batch:
+                self._process_one(records, future)
+            return
+
+        start = 0
+        for records, future in batch:
+            future.set_result(self._result(records, labels[start:start + len(records)]))
+            start += len(records)
+
+    ## \brief Функция обработки записей одного запроса
+    ## \param[in] records Список записей запроса
+    ## \param[in] future Future запроса
+    ## \return None
+    def _process_one (self, records: list[dict], future: Future) -> None:
+        try:
+            future.set_result(self._result(records, self.predictor.predict_many(records)))
+        except Exception as error:
+            future.set_exception(error)
+
+    ## \brief Функция формирования ответа для записей запроса
+    ## \param[in] records Список записей запроса
+    ## \param[in] labels Исходы в порядке записей
+    ## \return Список list() словарей с CustomerID и Исход
+    def _result (self, records: list[dict], labels: list) -> list[dict]:
+        return [{"CustomerID": record.get("CustomerID"), "Исход": label} for record, label in zip(records, labels)]
+
+## \brief Класс обработчика HTTP-запросов
+## \authors ivan-dev-lab
+## \version 1.2.0
+## \date 18.10.2026
+## \details Запрос POST /predict принимает один JSON-объект с данными клиента или несколько объектов в формате JSON Lines ( по одному на строку ). Ответ возвращается в формате JSON Lines в том же порядке
+## \details Некорректный JSON и записи, не прошедшие validate_records, возвращают ответ 400 и не попадают в очередь MicroBatcher
+## \details Заголовки и тело ответа отправляются двумя записями в сокет. При соединении keep-alive алгоритм Нейгла задерживает вторую запись до ACK клиента, а клиент откладывает ACK, поэтому каждый ответ ждал около 40 мс. disable_nagle_algorithm включает TCP_NODELAY для каждого соединения
+## \code
+# curl -X POST localhost:8000/predict -d '{"CustomerID": 1, "Age": 22, "Gender": "Female", "Usage Frequency": 14, "Support Calls": 4, "Payment Delay": 27, "Subscription Type": "Basic", "Contract Length": "Monthly", "Total Spend": 598}'
+## \endcode
+class ScoringHandler (BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    batcher = None
+
+    def do_POST (self):
+        if self.path != "/predict":
+            self._reply(404, {"error": f"Неизвестный путь [{self.path}]"})
+            return
+
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+            records = [json.loads(line) for line in body.splitlines() if line.strip()]
+        except ValueError as error:
+            self._reply(400, {"error": f"Некорректный JSON: {error}"})
+            return
+
+        if len(records) == 0:
+            self._reply(400, {"error": "Запрос не содержит записей"})
+            return
+
+        error = validate_records(records)
+        if error != None:
+            self._reply(400, {"error": error})
+            return
+
+        try:
+            self._reply(200, *self.batcher.predict(records))
+        except Exception as error:
+            self._reply(500, {"error": str(error)})
+
+    def do_GET (self):
+        if self.path == "/health":
+            self._reply(200, {"status": "ok"})
+        else:
+            self._reply(404, {"error": f"Неизвестный путь [{self.path}]"})
+
+    ## \brief Функция отправки ответа в формате JSON Lines
+    ## \param[in] status HTTP-код ответа
+    ## \param[in] rows Объекты, которые будут записаны по одному на строку
+    ## \return None
+    def _reply (self, status: int, *rows) -> None:
+        body = "\n".join(json.dumps(row, ensure_ascii=False) for row in rows).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message (self, format, *args):
+        pass
+
+## \brief Функция запуска сервера предсказаний
+## \authors ivan-dev-lab
+## \version 1.2.0
+## \date 18.10.2026
+## \details Модель загружается один раз при запуске и остается в памяти, поэтому каждый запрос тратит время только на предобработку и предсказание. pandas и sklearn импортируются только после разбора аргументов. Пример запуска из каталога Keeper_AI:
+## \code
+# python server.py --model C:/Users/User/Keeper_AI-work/model --port 8000
+## \endcode
+## \return None
+def main ():
+    parser = argparse.ArgumentParser(description="Keeper_AI - сервер предсказаний.")
+    parser.add_argument("--model", type=str, help="Путь до каталога model с реестром моделей, сохраненным main.py ( загружается текущая версия ), или до файла pipeline.pkl", required=True)
+    parser.add_argument("--host", type=str, help="Адрес сервера. По умолчанию = 127.0.0.1", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Порт сервера. По умолчанию = 8000", default=8000)
+    parser.add_argument("--max-batch", type=int, help="Максимальное количество записей в одном вызове модели. По умолчанию = 1024", default=1024)
+    parser.add_argument("--max-wait", type=float, help="Время ожидания одновременных запросов в миллисекундах. По умолчанию = 2", default=2.0)
+    args = parser.parse_args()
+
+    from pipeline import load_pipeline
+    ScoringHandler.batcher = MicroBatcher(load_pipeline(args.model), max_batch=args.max_batch, max_wait=args.max_wait / 1000)
+
+    server = ThreadingHTTPServer((args.host, args.port), ScoringHandler)
+    print(f"Сервер предсказаний запущен по адресу http://{args.host}:{args.port}/predict")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import tempfile
+import uuid
+import numpy as np
+from preprocess import USED_COLUMNS, FeatureEncoder
+from data_io import iter_clients
+
+## \brief Режимы обучения модели
+## \authors ivan-dev-lab
+## \version 1.1.0
+## \date 18.10.2026
+## \details <ol>
+## <li><b>pandas</b> - тренировочный файл читается в pandas целиком и обрабатывается функцией preprocess.preprocess</li>
+## <li><b>memmap</b> - файл читается частями, а признаки всех строк записываются в матрицу float32 в файле на диске ( np.memmap ). Это убирает из памяти DataFrame и строковые столбцы, но не делает обучение внешним: HistGradientBoostingClassifier.fit проверяет X с dtype=float64 и копирует всю матрицу в память, а при ранней остановке еще раз делит ее на обучающую и проверочную части. Поэтому расход памяти растет с количеством строк, хотя и меньше, чем в режиме pandas</li>
+## <li><b>sample</b> - файл читается частями, а в матрицу float32 в памяти попадает стратифицированная по Churn выборка из max_rows строк. Единственный режим, в котором память при обучении ограничена и не зависит от размера файла, поэтому для больших тренировочных данных нужно использовать его</li>
+## </ol>
+TRAIN_MODES = ["pandas", "memmap", "sample"]
+
+## \brief Количество строк тренировочного файла, читаемых за один раз
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+TRAIN_CHUNKSIZE = 100_000
+
+## \brief Размер стратифицированной выборки по умолчанию для режима sample
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+TRAIN_SAMPLE_ROWS = 1_000_000
+
+## \brief Количество новых итераций бустинга при дообучении модели
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+WARM_START_ITERATIONS = 50
+
+## \brief Функция чтения тренировочных данных по частям
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] fpath Путь до тренировочных данных в формате [.CSV|.PARQUET]
+## \param[in] chunksize Количество строк в одной части
+## \details Из каждой части сразу удаляются строки с пропусками в признаках или в Churn, как в preprocess.preprocess
+## \return Генератор DataFrame с частями тренировочных данных
+def _iter_train (fpath: str, chunksize: int):
+    for chunk in iter_clients(fpath, chunksize, columns=USED_COLUMNS + ["Churn"]):
+        yield chunk[chunk[USED_COLUMNS + ["Churn"]].notna().all(axis=1).to_numpy()]
+
+## \brief Функция расчета размера стратифицированной выборки
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] counts Словарь с количеством строк каждого класса Churn
+## \param[in] max_rows Размер выборки. Если None или больше количества строк, то берутся все строки
+## \details Доля каждого класса в выборке совпадает с его долей в тренировочных данных
+## \return Словарь dict() с количеством строк каждого класса в выборке
+def _sample_sizes (counts: dict, max_rows: int=None) -> dict:
+    total = sum(counts.values())
+    if max_rows == None or max_rows >= total:
+        return dict(counts)
+
+    return {label: min(count, round(max_rows * count / total)) for label, count in counts.items()}
+
+## \brief Функция построения матрицы признаков из тренировочных данных, читаемых по частям
+## \authors ivan-dev-lab
+## \version 1.0.0
+## \date 18.10.2026
+## \param[in] fpath Путь до тренировочных данных в формате [.CSV|.PARQUET]
+## \param[in] mode Режим "memmap" или "sample" из TRAIN_MODES
+## \param[in] chunksize Количество строк в одной части. По умолчанию = TRAIN_CHUNKSIZE
+## \param[in] max_rows Размер выборки для режима "sample". По умолчанию = TRAIN_SAMPLE_ROWS
+## \param[in] work_dir Каталог для файлов np.memmap в режиме "memmap". По умолчанию = None ( временный каталог системы )
+## \param[in,out] state Словарь с состоянием предобработки. Если в нем уже есть "encoder" ( например, при дообучении модели ), то используется он, иначе в state записываются новые "encoder" и "scaler". По умолчанию = None
+## \param[in] random_state Зерно генератора для режима "sample". По умолчанию = 42
+## \details Файл читается два раза. Первый проход собирает значения категорий и количество строк каждого класса Churn. Второй проход кодирует части в заранее выделенную матрицу float32 и обновляет статистики StandardScaler через partial_fit. После этого матрица масштабируется на месте блоками по chunksize строк
+## \details В режиме "sample" из каждой части для каждого класса берется случайное количество строк из гипергеометрического распределения, поэтому итоговая выборка - это равновероятная выборка без возвращения ровно нужного размера, а в памяти одновременно находятся только часть файла и выборка
+## \code
+# taken = rng.hypergeometric(len(rows), remaining[label] - len(rows), needed[label])
+# rows = np.sort(rng.choice(rows, taken, replace=False))
+## \endcode
+## \return Кортеж tuple(), содержащий матрицу признаков float32 ( np.memmap или np.ndarray ) и массив целевых переменных int8
+def build_train_matrix (fpath: str, mode: str, chunksize: int=TRAIN_CHUNKSIZE, max_rows: int=TRAIN_SAMPLE_ROWS, work_dir: str=None, state: dict=None, random_state: int=42) -> tuple:
+    from sklearn.preprocessing import StandardScaler
+
+    state = state if state is not None else {}
+    fit_encoder = "encoder" not in state
+    encoder = FeatureEncoder() if fit_encoder else state["encoder"]
+    counts = {}
+
+    for chunk in _iter_train(fpath, chunksize):
+        if fit_encoder:
+            encoder.partial_fit(chunk)
+        for label, count in chunk["Churn"].value_counts().items():
+            counts[int(label)] = counts.get(int(label), 0) + int(count)
+
+    needed = _sample_sizes(counts, max_rows if mode == "sample" else None)
+    remaining = dict(counts)
+    n_rows, n_features = sum(needed.values()), len(encoder.feature_names_)
+
+    if mode == "memmap":
+        work_dir = work_dir if work_dir != None else tempfile.gettempdir()
+        name = uuid.uuid4().hex
+        X = np.memmap(f"{work_dir}/{name}.X.f32", dtype=np.float32, mode="w+", shape=(max(n_rows, 1), n_features))[:n_rows]
+        Y = np.memmap(f"{work_dir}/{name}.Y.i8", dtype=np.int8, mode="w+", shape=(max(n_rows, 1),))[:n_rows]
+    else:
+        X = np.empty((n_rows, n_features), dtype=np.float32)
+        Y = np.empty(n_rows, dtype=np.int8)
+
+    rng = np.random.default_rng(random_state)
+    scaler = StandardScaler()
+    position = 0
+
+    for chunk in _iter_train(fpath, chunksize):
+        labels = chunk["Churn"].to_numpy().astype(np.int8)
+
+        if mode == "sample" and n_rows < sum(counts.values()):
+            taken_rows = []
+            for label in needed:
+                rows = np.flatnonzero(labels == label)
+                taken = rng.hypergeometric(len(rows), remaining[label] - len(rows), needed[label]) if needed[label] > 0 else 0
+                taken_rows.append(rng.choice(rows, taken, replace=False))
+                needed[label] -= taken
+                remaining[label] -= len(rows)
+            rows = np.sort(np.concatenate(taken_rows))
+        else:
+            rows = np.arange(len(chunk))
+
+        features = encoder.transform(chunk)[0]
+        if fit_encoder:
+            scaler.partial_fit(features)
+
+        X[position:position + len(rows)] = features[rows]
+        Y[position:position + len(rows)] = labels[rows]
+        position += len(rows)
+
+    if fit_encoder:
+        encoder.set_scaling(scaler.mean_, scaler.scale_)
+        for start in range(0, n_rows, chunksize):
+            encoder.scale(X[start:start + chunksize])
+
+        state["encoder"] = encoder
+        state["scaler"] = scaler
+
+    return (X, Y)
+
+## \brief Функция обучения конвейера предсказаний на данных, читаемых по частям
+## \authors ivan-dev-lab
+## \version 1.0.1
+## \date 18.10.2026
+## \param[in] fpath Путь до тренировочных данных в формате [.CSV|.PARQUET]
+## \param[in] model Модель-классификатор с методами fit и predict
+## \param[in] mode Режим "memmap" или "sample" из TRAIN_MODES
+## \param[in] chunksize Количество строк в одной части. По умолчанию = TRAIN_CHUNKSIZE
+## \param[in] max_rows Размер выборки для режима "sample". По умолчанию = TRAIN_SAMPLE_ROWS
+## \param[in] work_dir Каталог для временных файлов np.memmap. По умолчанию = None ( временный каталог системы )
+## \param[in] previous Конвейер с ранее обученной моделью HistGradientBoostingClassifier для дообучения. По умолчанию = None
+## \details При previous модель не обучается заново: к ее деревьям добавляется WARM_START_ITERATIONS новых итераций бустинга ( warm_start=True ) на новых данных. Деревья модели обучены на признаках, масштабированных статистиками previous["encoder"], поэтому новые данные кодируются тем же кодировщиком, а не обученным заново
+## \details Если в previous нет кодировщика ( модель из старого файла HistGradientBoostingClassifier.pkl ), то кодировщик обучается на новых данных
+## \details Файлы np.memmap удаляются после обучения. В режиме "memmap" model.fit копирует матрицу в память ( см. TRAIN_MODES ), поэтому ограниченный расход памяти дает только режим "sample"
+## \return Кортеж tuple(), содержащий словарь dict() с конвейером, как в pipeline.fit_pipeline, и количество строк, на которых обучалась модель
+def fit_streaming_pipeline (fpath: str, model, mode: str, chunksize: int=TRAIN_CHUNKSIZE, max_rows: int=TRAIN_SAMPLE_ROWS, work_dir: str=None, previous: dict=None) -> tuple:
+    state = {}
+
+    if previous != None:
+        model = previous["model"]
+        model.set_params(warm_start=True, max_iter=model.n_iter_ + WARM_START_ITERATIONS)
+        if previous.get("encoder") != None:
+            state = {"encoder": previous["encoder"], "scaler": previous["scaler"]}
+
+    with tempfile.TemporaryDirectory(dir=work_dir, ignore_cleanup_errors=True) as tmp_dir:
+        X, Y = build_train_matrix(fpath, mode, chunksize=chunksize, max_rows=max_rows, work_dir=tmp_dir, state=state)
+        n_rows = len(Y)
+
+        model.fit(X, Y)
+        del X, Y
+
+    return ({"encoder": state["encoder"], "scaler": state["scaler"], "model": model, "version": uuid.uuid4().hex}, n_rows)